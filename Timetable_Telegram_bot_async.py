@@ -0,0 +1,134 @@
+import os
+import sys
+import asyncio
+import logging
+from typing import cast
+
+from dotenv import load_dotenv
+from telebot import TeleBot, asyncio_helper, util
+from telebot.async_telebot import AsyncTeleBot
+
+from async_bot_utils import AsyncBotUtils, MeteredSessionManager, ThreadedBot
+from bot_utils import BotUtils
+from handlers import Handlers, scoped_commands
+from utils import Utils
+from modules.storage import StorageBackend, create_storage
+from modules.json_file import JSON_File
+from modules.async_queries import AsyncQueries
+from modules.sql_queries import Queries
+from modules.timetable import Timetable
+from modules.scheduler import DayScheduler
+from modules.metrics import Metrics
+from modules.sql_trace import SQLTracer
+from modules.bootstrap import Bootstrap
+from modules.conversation import ConversationStore
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.FileHandler("bot_log.log", 'w', encoding="UTF-8"))
+logging.basicConfig(level=logging.INFO, format="|%(asctime)s| %(levelname)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+load_dotenv(override=True)
+bootstrap = Bootstrap(logger, os.environ.get("STATE_FILENAME", "bot_state.json"))
+metrics = Metrics(logger, enabled=os.environ.get("METRICS_PORT", "").strip() != "")
+if metrics.enabled:
+    asyncio_helper.session_manager = MeteredSessionManager(metrics, "telegram_request")
+try:
+    bot = AsyncTeleBot(os.environ["BOT_TOKEN"], parse_mode="HTML")
+except KeyError:
+    logger.critical("Відсутній токен боту! (перевірте файл .env)")
+    sys.exit(1)
+except ValueError:
+    logger.critical("Токен бота не валідний!")
+    sys.exit(1)
+threaded_bot = ThreadedBot(bot, int(os.environ.get("HANDLER_WORKERS", "8")))
+logger.info("Бот почав роботу в асинхронному режимі!")
+
+try:
+    storage: StorageBackend = create_storage(logger, lazy=True)
+except (KeyError, ValueError) as error:
+    logger.critical("Деякі (або всі) параметри для підключення бази даних відсутні, перевірте їх наявність! (перевірте файл .env)")
+    sys.exit(1)
+except Exception as exception:
+    logger.critical(f"Помилка при підключенні до бази даних: \"{exception}\"")
+    sys.exit(1)
+
+try:
+    json_file = JSON_File(os.environ["JSON_FILENAME"])
+except KeyError:
+    logger.critical("Відсутня назва файлу JSON! (перевірте файл .env)")
+    sys.exit(1)
+except FileNotFoundError:
+    logger.critical("Файл JSON не був знайден!")
+    sys.exit(1)
+
+sql_trace_budget: str = os.environ.get("SQL_TRACE_BUDGET", "").strip()
+tracer: SQLTracer|None = SQLTracer(storage.cursor, logger, int(sql_trace_budget)) if sql_trace_budget != "" else None
+queries = Queries(tracer.cursor if tracer is not None else storage.cursor, logger)
+metrics.instrument(queries, "query", "method")
+async_queries = AsyncQueries(queries, storage.pool_size)
+
+timetable = Timetable(queries, logger, json_file)
+
+utils = Utils(queries, timetable, json_file, logger)
+
+conversations = ConversationStore(logger, queries, ttl=float(os.environ.get("CONVERSATION_TTL", "900")),
+                                  max_size=int(os.environ.get("CONVERSATION_MAX_SIZE", "10000")))
+bot_utils = BotUtils(cast(TeleBot, threaded_bot), queries, utils, logger, metrics, conversations)
+async_bot_utils = AsyncBotUtils(bot, async_queries, utils, logger, metrics)
+
+get_datetime = utils.get_datetime
+metrics.add_cache("render", timetable.render_cache)
+metrics.add_cache("chats", bot_utils.chats)
+metrics.add_cache("chat_members", bot_utils.chat_members)
+metrics.add_cache("me", bot_utils.me)
+metrics.add_cache("conversations", conversations)
+logger.info(f"Час для бота зараз {get_datetime().isoformat(sep=' ', timespec='seconds')}")
+
+scheduler = DayScheduler(queries, timetable, get_datetime, async_bot_utils.distribute, logger, metrics, tracer)
+
+handlers = Handlers(cast(TeleBot, threaded_bot), queries, timetable, utils, bot_utils)
+handlers.register(bot, threaded_bot.threaded)
+
+async def distribution_cycle() -> None:
+    await async_bot_utils.resume_distribution(await asyncio.to_thread(get_datetime))
+    await scheduler.run_async()
+
+metrics.instrument_handlers(bot)
+if tracer is not None:
+    tracer.trace_bot(bot)
+
+async def set_commands() -> None:
+    await threaded_bot.run(bootstrap.set_commands, threaded_bot, scoped_commands)
+
+async def load_me() -> None:
+    await threaded_bot.run(lambda: bot_utils.me.set("me", bootstrap.get_me(threaded_bot)))
+
+async def prepare_database() -> None:
+    await async_queries.run(queries.create_tables)
+    await async_queries.snapshot()
+    await async_queries.run(conversations.load)
+
+async def main() -> None:
+    bootstrap.mark("ініціалізація")
+    await asyncio.gather(
+        bootstrap.run_async("команди", set_commands(), required=False),
+        bootstrap.run_async("get_me", load_me(), required=False),
+        bootstrap.run_async("база даних", prepare_database())
+    )
+    bootstrap.shutdown()
+    bootstrap.report()
+    if metrics.enabled:
+        metrics.serve(os.environ.get("METRICS_HOST", "127.0.0.1"), int(os.environ["METRICS_PORT"]))
+    distribution_task: asyncio.Task[None] = asyncio.create_task(distribution_cycle())
+    logger.info("Розсилка працює.")
+    try:
+        await bot.infinity_polling(allowed_updates=util.update_types)
+    finally:
+        distribution_task.cancel()
+        async_queries.shutdown()
+        threaded_bot.shutdown()
+        await bot.close_session()
+
+if __name__ == "__main__":
+    asyncio.run(main())
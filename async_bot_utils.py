@@ -0,0 +1,142 @@
+import time
+import asyncio
+import inspect
+import contextvars
+from logging import Logger
+from datetime import datetime
+from functools import partial, wraps
+from typing import Any, Awaitable, Callable, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from telebot import asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+from modules.metrics import Metrics
+from modules.async_broadcast import AsyncBroadcaster
+from modules.async_queries import AsyncQueries
+from modules.dict_types import BroadcastDicts, TableDicts
+from utils import Utils
+
+_Result = TypeVar("_Result")
+
+class MeteredSessionManager(asyncio_helper.SessionManager):
+    def __init__(self, metrics: Metrics, name: str):
+        super().__init__()
+        self.metrics: Metrics = metrics
+        self.name: str = name
+
+    async def create_session(self) -> aiohttp.ClientSession:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self.__started)
+        trace_config.on_request_end.append(self.__finished)
+        trace_config.on_request_exception.append(self.__failed)
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=asyncio_helper.REQUEST_LIMIT, ssl=self.ssl_context),
+                                             trace_configs=[trace_config])
+        return self.session
+
+    async def __started(self, session: aiohttp.ClientSession, context: Any, params: aiohttp.TraceRequestStartParams) -> None:
+        context.started = time.perf_counter()
+
+    async def __finished(self, session: aiohttp.ClientSession, context: Any, params: aiohttp.TraceRequestEndParams) -> None:
+        self.metrics.observe(f"{self.name}_seconds", time.perf_counter() - context.started, method=params.url.name)
+
+    async def __failed(self, session: aiohttp.ClientSession, context: Any, params: aiohttp.TraceRequestExceptionParams) -> None:
+        self.metrics.inc(f"{self.name}_errors_total", method=params.url.name)
+        self.metrics.observe(f"{self.name}_seconds", time.perf_counter() - context.started, method=params.url.name)
+
+class ThreadedBot:
+    def __init__(self, bot: AsyncTeleBot, workers: int = 8):
+        self.bot: AsyncTeleBot = bot
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="handler")
+        self.__loop: asyncio.AbstractEventLoop|None = None
+
+    def __getattr__(self, name: str) -> Any:
+        attribute: Any = getattr(self.bot, name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def call(*args, **kwargs):
+            if self.__loop is None:
+                raise RuntimeError("Цикл подій ще не запущено!")
+            return asyncio.run_coroutine_threadsafe(attribute(*args, **kwargs), self.__loop).result()
+        return call
+
+    async def run(self, function: Callable[..., _Result], *args: Any) -> _Result:
+        self.__loop = asyncio.get_running_loop()
+        return await self.__loop.run_in_executor(self.__executor, partial(contextvars.copy_context().run, function, *args))
+
+    def threaded(self, function: Callable[..., _Result]) -> Callable[..., Awaitable[_Result]]:
+        @wraps(function)
+        async def wrap(*args):
+            return await self.run(function, *args)
+        return wrap
+
+    def shutdown(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncBotUtils:
+    def __init__(self, bot: AsyncTeleBot, queries: AsyncQueries, utils: Utils, logger: Logger, metrics: Metrics|None = None):
+        self.bot: AsyncTeleBot = bot
+        self.queries: AsyncQueries = queries
+        self.utils: Utils = utils
+        self.logger: Logger = logger
+        self.metrics: Metrics = metrics or Metrics(logger, enabled=False)
+        self.broadcaster: AsyncBroadcaster = AsyncBroadcaster(logger)
+
+
+    async def distribute(self, text: str, sticker_type: list[str], key: str, expires_at: datetime|None = None) -> None:
+        created_at: datetime = (await asyncio.to_thread(self.utils.get_datetime)).replace(tzinfo=None)
+        broadcast: TableDicts.BroadcastDict|None = await self.queries.create_broadcast(key, text, await self.queries.get_sticker_id(sticker_type), expires_at, created_at)
+        if broadcast is not None:
+            await self.drain_broadcast(broadcast)
+
+    async def drain_broadcast(self, broadcast: TableDicts.BroadcastDict, page_size: int = 200) -> None:
+        sticker_id: str|None = broadcast["sticker_id"]
+        messages: list[Callable[[int], Awaitable[Any]]] = [lambda chat_id: self.bot.send_message(chat_id, broadcast["text"])]
+        if sticker_id is not None:
+            messages.append(lambda chat_id: self.bot.send_sticker(chat_id, sticker_id))
+        total: BroadcastDicts.ResultDict = {"sent": [], "failed": [], "unreachable": [], "duration": 0}
+        sending: asyncio.Task[BroadcastDicts.ResultDict]|None = None
+        async for page in self.queries.iter_pending_chats(broadcast["id"], page_size):
+            if sending is not None:
+                await self.__record(broadcast, total, await sending)
+            sending = asyncio.create_task(self.broadcaster.broadcast(page, messages))
+        if sending is not None:
+            await self.__record(broadcast, total, await sending)
+        if len(total["sent"]) + len(total["failed"]) + len(total["unreachable"]) < 1:
+            self.logger.warning("Ні у кого з користувачів вімкнена розсилка!")
+            return
+        await self.queries.set_subscriptions(total["unreachable"], False)
+        self.__record_metrics(total)
+        self.logger.info(f"Розсилка \"{broadcast['key']}\" завершена за {total['duration']:.2f} с: доставлено {len(total['sent'])}, "
+                         f"з помилкою {len(total['failed'])}, відписано {len(total['unreachable'])}.")
+
+    def __record_metrics(self, total: BroadcastDicts.ResultDict) -> None:
+        self.metrics.observe("broadcast_fanout_seconds", total["duration"])
+        for status in ["sent", "failed", "unreachable"]:
+            self.metrics.inc("broadcast_messages_total", len(total[status]), status=status)
+
+    async def __record(self, broadcast: TableDicts.BroadcastDict, total: BroadcastDicts.ResultDict, result: BroadcastDicts.ResultDict) -> None:
+        for status in ["sent", "failed", "unreachable"]:
+            await self.queries.set_outbox_status(broadcast["id"], result[status], status)
+            total[status] += result[status]
+        total["duration"] += result["duration"]
+        for chat_id in result["unreachable"]:
+            self.logger.warning(f"Знайден чат, в який не вдається відправити інформацію, він буде відписан. ID = {chat_id}!")
+
+    async def resume_distribution(self, date_time: datetime) -> None:
+        date_time = date_time.replace(tzinfo=None)
+        for broadcast in await self.queries.get_pending_broadcasts():
+            if broadcast["expires_at"] is not None and broadcast["expires_at"] <= date_time:
+                self.logger.info(f"Розсилка \"{broadcast['key']}\" вже не актуальна, недоставлені повідомлення скасовано.")
+                await self.queries.expire_broadcast(broadcast["id"])
+                continue
+            self.logger.info(f"Відновлення незавершеної розсилки \"{broadcast['key']}\".")
+            await self.drain_broadcast(broadcast)
+        await self.queries.prune_broadcasts(date_time)
+
+if __name__ == "__main__":
+    exit()
@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import importlib
+from types import ModuleType
+from datetime import date, timedelta
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telebot import apihelper
+from telebot.types import Update
+
+from modules.broadcast import Broadcaster
+from fake_telegram import FakeTelegram
+from local_db import LocalDB
+
+BOT_ID: int = 123456789
+CREATOR_ID: int = 1000
+GROUP_ID: int = -1001000
+
+
+class Benchmark:
+    def __init__(self, app: ModuleType, transport: FakeTelegram, database: LocalDB):
+        self.app: ModuleType = app
+        self.transport: FakeTelegram = transport
+        self.database: LocalDB = database
+        self.__update_id: int = 0
+
+    def __next_id(self) -> int:
+        self.__update_id += 1
+        return self.__update_id
+
+    def message_update(self, text: str, chat_id: int|None = None, user_id: int|None = None) -> Update:
+        update_id: int = self.__next_id()
+        user_id = user_id or 10_000_000 + update_id
+        chat_id = chat_id or user_id
+        chat: dict[str, Any] = {"id": chat_id, "type": "private", "first_name": "Bench"} if chat_id > 0 else {"id": chat_id, "type": "supergroup", "title": "Bench group"}
+        command_length: int = len(text.split(' ', 1)[0])
+        return Update.de_json({
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id, "date": int(time.time()), "chat": chat, "text": text,
+                "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+                "entities": [{"type": "bot_command", "offset": 0, "length": command_length}] if text.startswith('/') else []
+            }
+        })
+
+    def callback_update(self, data: str) -> Update:
+        update_id: int = self.__next_id()
+        user_id: int = 10_000_000 + update_id
+        return Update.de_json({
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id), "chat_instance": str(update_id), "data": data,
+                "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+                "message": {"message_id": update_id, "date": int(time.time()), "chat": {"id": user_id, "type": "private", "first_name": "Bench"}, "text": "Bench"}
+            }
+        })
+
+    def measure(self, action: Callable[[], Any]) -> tuple[float, int, int]:
+        statements: int = self.database.statements
+        messages: int = self.transport.messages()
+        started: float = time.perf_counter()
+        action()
+        return time.perf_counter() - started, self.database.statements - statements, self.transport.messages() - messages
+
+    def command(self, make_update: Callable[[], Update], runs: int) -> dict[str, float]:
+        samples: list[tuple[float, int, int]] = [self.measure(lambda: self.app.bot.process_new_updates([make_update()])) for _ in range(runs)]
+        latencies: list[float] = sorted(sample[0] for sample in samples)
+        return {
+            "p50": percentile(latencies, 50) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "sql": sum(sample[1] for sample in samples) / runs,
+            "messages": sum(sample[2] for sample in samples) / runs
+        }
+
+    def broadcast(self, subscribers: int, rate: float, workers: int) -> dict[str, float]:
+        self.database.set_subscribers(subscribers)
+        self.app.bot_utils.broadcaster.shutdown()
+        self.app.bot_utils.broadcaster = Broadcaster(self.app.logger, workers=workers, rate=rate)
+        duration, statements, messages = self.measure(
+            lambda: self.app.bot_utils.distribute("Бенчмарк розсилки", ["study"], f"bench {subscribers} {self.__next_id()}")
+        )
+        return {"subscribers": subscribers, "seconds": duration, "sql": statements, "messages": messages, "per_second": messages / duration}
+
+
+def percentile(values: list[float], rank: float) -> float:
+    return values[min(len(values) - 1, max(0, round(rank / 100 * len(values) + 0.5) - 1))]
+
+
+def load_app(args: argparse.Namespace) -> tuple[ModuleType, FakeTelegram, LocalDB]:
+    workdir: str = tempfile.mkdtemp(prefix="timetable_bench_")
+    os.chdir(workdir)
+    with open("config.json", 'w', encoding="UTF-8") as json_file:
+        json.dump({
+            "timezone": "Europe/Kyiv",
+            "first_flasher_monday": (date.today() - timedelta(days=date.today().weekday())).isoformat(),
+            "main_group": {"name": "Bench group", "id": GROUP_ID}
+        }, json_file)
+    os.environ.update({
+        "BOT_TOKEN": f"{BOT_ID}:AAbenchmarkbenchmarkbenchmarkbench", "JSON_FILENAME": os.path.join(workdir, "config.json"),
+        "DB_BACKEND": "sqlite", "DB_PATH": os.path.join(workdir, "bench.sqlite3"), "CREATOR_ID": str(CREATOR_ID)
+    })
+
+    transport: FakeTelegram = FakeTelegram(BOT_ID, args.latency / 1000)
+    apihelper.CUSTOM_REQUEST_SENDER = transport
+    database: LocalDB = LocalDB(os.environ["DB_PATH"], logging.getLogger(__name__))
+    database.seed()
+    database.set_subscribers(args.users)
+
+    app: ModuleType = importlib.import_module("Timetable_Telegram_bot")
+    app.bot.threaded = False
+    app.start()
+    app.queries._cursor = database.counting(app.queries._cursor)
+    logging.getLogger().setLevel(logging.WARNING)
+    return app, transport, database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Офлайн бенчмарк обробників бота та розсилки.")
+    parser.add_argument("--runs", type=int, default=200, help="кількість запусків кожної команди")
+    parser.add_argument("--users", type=int, default=1000, help="кількість користувачів у базі для команд")
+    parser.add_argument("--subscribers", type=int, nargs='*', default=[10_000, 100_000], help="розміри розсилок")
+    parser.add_argument("--latency", type=float, default=0, help="затримка фейкового Telegram API, мс")
+    parser.add_argument("--rate", type=float, default=1e9, help="ліміт повідомлень на секунду для розсилки")
+    parser.add_argument("--workers", type=int, default=8, help="кількість потоків розсилки")
+    args = parser.parse_args()
+
+    app, transport, database = load_app(args)
+    benchmark = Benchmark(app, transport, database)
+    commands: dict[str, Callable[[], Update]] = {
+        "/start": lambda: benchmark.message_update("/start"),
+        "/start (група)": lambda: benchmark.message_update("/start", GROUP_ID),
+        "/subscription": lambda: benchmark.message_update("/subscription"),
+        "/subscribe": lambda: benchmark.message_update("/subscribe"),
+        "/rings": lambda: benchmark.message_update("/rings"),
+        "/timetable": lambda: benchmark.message_update("/timetable"),
+        "/today": lambda: benchmark.message_update("/today"),
+        "/tomorrow": lambda: benchmark.message_update("/tomorrow"),
+        "/current_lesson": lambda: benchmark.message_update("/current_lesson"),
+        "/get_lesson": lambda: benchmark.message_update("/get_lesson"),
+        "/editor": lambda: benchmark.message_update("/editor", user_id=CREATOR_ID),
+        "callback subscription": lambda: benchmark.callback_update("subscription /subscribe"),
+    }
+
+    print(f"{'Команда':<24}{'p50, мс':>10}{'p99, мс':>10}{'SQL':>8}{'Повідомл.':>11}")
+    for name, make_update in commands.items():
+        result: dict[str, float] = benchmark.command(make_update, args.runs)
+        print(f"{name:<24}{result['p50']:>10.3f}{result['p99']:>10.3f}{result['sql']:>8.2f}{result['messages']:>11.2f}")
+
+    print(f"\n{'Підписників':<14}{'Час, с':>10}{'SQL':>8}{'Повідомл.':>11}{'Повідомл./с':>13}")
+    for subscribers in args.subscribers:
+        result = benchmark.broadcast(subscribers, args.rate, args.workers)
+        print(f"{subscribers:<14}{result['seconds']:>10.2f}{result['sql']:>8}{result['messages']:>11}{result['per_second']:>13.0f}")
+
+if __name__ == "__main__":
+    main()
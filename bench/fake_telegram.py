@@ -0,0 +1,67 @@
+import json
+import time
+import itertools
+from threading import Lock
+from collections import Counter
+from typing import Any
+
+
+class FakeResponse:
+    def __init__(self, result: Any):
+        self.status_code: int = 200
+        self.__payload: dict[str, Any] = {"ok": True, "result": result}
+
+    @property
+    def text(self) -> str:
+        return json.dumps(self.__payload)
+
+    def json(self) -> dict[str, Any]:
+        return self.__payload
+
+
+class FakeTelegram:
+    def __init__(self, bot_id: int, latency: float = 0):
+        self.bot_id: int = bot_id
+        self.latency: float = latency
+        self.calls: Counter[str] = Counter()
+        self.__message_ids = itertools.count(1)
+        self.__lock: Lock = Lock()
+
+    def __call__(self, method: str, url: str, params: dict[str, Any]|None = None, files: Any = None, timeout: Any = None, proxies: Any = None) -> FakeResponse:
+        method_name: str = url.rsplit('/', 1)[-1]
+        with self.__lock:
+            self.calls[method_name] += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return FakeResponse(self.__result(method_name, params or dict()))
+
+    def __chat(self, chat_id: int) -> dict[str, Any]:
+        if chat_id < 0:
+            return {"id": chat_id, "type": "supergroup", "title": "Bench group"}
+        return {"id": chat_id, "type": "private", "first_name": "Bench"}
+
+    def __result(self, method_name: str, params: dict[str, Any]) -> Any:
+        match method_name:
+            case "getMe":
+                return {"id": self.bot_id, "is_bot": True, "first_name": "Timetable", "username": "timetable_bench_bot"}
+            case "getChat":
+                return self.__chat(int(params["chat_id"]))
+            case "getChatMember":
+                return {"status": "member", "user": {"id": int(params["user_id"]), "is_bot": False, "first_name": "Bench"}}
+            case "sendMessage" | "sendSticker":
+                with self.__lock:
+                    message_id: int = next(self.__message_ids)
+                return {"message_id": message_id, "date": int(time.time()), "chat": self.__chat(int(params["chat_id"])), "text": params.get("text", "")}
+            case _:
+                return True
+
+    def messages(self) -> int:
+        with self.__lock:
+            return self.calls["sendMessage"] + self.calls["sendSticker"]
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.calls.clear()
+
+if __name__ == "__main__":
+    exit()
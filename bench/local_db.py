@@ -0,0 +1,79 @@
+import logging
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Iterator, Sequence
+
+from modules.storage import Cursor
+from modules.sqlite_db import SQLite
+
+
+class CountingCursor:
+    def __init__(self, cursor: Cursor, database: "LocalDB"):
+        self.__cursor: Cursor = cursor
+        self.__database: LocalDB = database
+
+    @property
+    def rowcount(self) -> int:
+        return self.__cursor.rowcount
+
+    @property
+    def lastrowid(self) -> int|None:
+        return self.__cursor.lastrowid
+
+    def execute(self, operation: str, params: Sequence[Any] = ()) -> None:
+        self.__database.statements += 1
+        self.__cursor.execute(operation, params)
+
+    def executemany(self, operation: str, seq_params: Sequence[Sequence[Any]]) -> None:
+        self.__database.statements += 1
+        self.__cursor.executemany(operation, seq_params)
+
+    def fetchone(self) -> Any:
+        return self.__cursor.fetchone()
+
+    def fetchall(self) -> list[Any]:
+        return self.__cursor.fetchall()
+
+
+class LocalDB:
+    def __init__(self, filename: str, logger: logging.Logger):
+        self.filename: str = filename
+        self.statements: int = 0
+        self.__storage: SQLite = SQLite(filename, logger, pool_size=1)
+
+    def counting(self, cursor: Callable[[], ContextManager[Cursor]]) -> Callable[[], ContextManager[CountingCursor]]:
+        @contextmanager
+        def counting_cursor() -> Iterator[CountingCursor]:
+            with cursor() as inner_cursor:
+                yield CountingCursor(inner_cursor, self)
+        return counting_cursor
+
+    def seed(self, rings: int = 6, lessons: int = 12) -> None:
+        with self.__storage.cursor() as cursor:
+            for ring_id in range(1, rings + 1):
+                start: datetime = datetime(2000, 1, 1, 8) + timedelta(minutes=95 * (ring_id - 1))
+                cursor.execute("INSERT INTO `ring` VALUES (%s, %s, %s, %s)", [ring_id, f"{ring_id} пара", start, start + timedelta(minutes=80)])
+            cursor.executemany(
+                "INSERT INTO `lesson` (name, link, class, max_grade) VALUES (%s, %s, %s, %s)",
+                [[f"Заняття {number}", f"https://meet.example/{number}", f"https://class.example/{number}", 100] for number in range(1, lessons + 1)]
+            )
+            for weekday_id in range(1, 8):
+                for ring_id in range(1, rings + 1):
+                    lesson_id: int = 1 if weekday_id > 5 or ring_id > 4 else 2 + (weekday_id * rings + ring_id) % lessons
+                    flasher_id: int|None = 2 + (lesson_id + 1) % lessons if ring_id == 2 else None
+                    cursor.execute(
+                        "INSERT INTO `timetable` (weekday_id, ring_id, lesson_id, flasher_id) VALUES (%s, %s, %s, %s)",
+                        [weekday_id, ring_id, lesson_id, flasher_id]
+                    )
+            cursor.executemany(
+                "INSERT INTO `sticker` VALUES (%s, %s)",
+                [[f"{sticker_type}_{index}", sticker_type] for sticker_type in ["happy", "study", "sad", "lovely", "service", "error"] for index in range(3)]
+            )
+
+    def set_subscribers(self, count: int, first_id: int = 1) -> None:
+        with self.__storage.cursor() as cursor:
+            cursor.execute("DELETE FROM `user`")
+            cursor.executemany("INSERT INTO `user` VALUES (%s, 1)", [[user_id] for user_id in range(first_id, first_id + count)])
+
+if __name__ == "__main__":
+    exit()
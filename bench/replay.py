@@ -0,0 +1,50 @@
+import json
+import time
+import argparse
+import urllib.error
+import urllib.request
+from typing import Any
+
+
+def load_updates(filename: str) -> list[dict[str, Any]]:
+    with open(filename, 'r', encoding="UTF-8") as updates_file:
+        content: str = updates_file.read().strip()
+    try:
+        updates: Any = json.loads(content)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+    return updates if isinstance(updates, list) else [updates]
+
+
+def post(url: str, update: dict[str, Any], secret: str|None) -> tuple[int, str]:
+    headers: dict[str, str] = {"Content-Type": "application/json"}
+    if secret:
+        headers["X-Telegram-Bot-Api-Secret-Token"] = secret
+    request = urllib.request.Request(url, json.dumps(update).encode("UTF-8"), headers, method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read().decode("UTF-8")
+    except urllib.error.HTTPError as error:
+        return error.code, error.read().decode("UTF-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Відправляє записані оновлення Telegram на локальний вебхук.")
+    parser.add_argument("files", nargs='+', help="JSON з оновленням, масивом оновлень або JSON Lines")
+    parser.add_argument("--url", default="http://127.0.0.1:8443/webhook", help="адреса вебхука")
+    parser.add_argument("--secret", default=None, help="значення WEBHOOK_SECRET")
+    parser.add_argument("--repeat", type=int, default=1, help="скільки разів відправити кожне оновлення")
+    args = parser.parse_args()
+
+    statuses: dict[int, int] = dict()
+    started: float = time.perf_counter()
+    for filename in args.files:
+        for update in load_updates(filename):
+            for _ in range(args.repeat):
+                status, body = post(args.url, update, args.secret)
+                statuses[status] = statuses.get(status, 0) + 1
+                print(f"{update.get('update_id')}: {status} {body}")
+    print(f"Відправлено {sum(statuses.values())} запитів за {time.perf_counter() - started:.2f} с: {statuses}")
+
+if __name__ == "__main__":
+    main()
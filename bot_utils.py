@@ -1,44 +1,113 @@
 import os
+import contextvars
 from logging import Logger
+from datetime import datetime
 from functools import wraps
-from typing import Callable, Any
+from typing import Callable, Any, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from telebot import TeleBot
 from telebot.apihelper import ApiException
-from telebot.types import InaccessibleMessage, Message, ReplyKeyboardMarkup, ReplyKeyboardRemove, ReplyParameters
+from telebot.types import Chat, ChatMember, InaccessibleMessage, Message, ReplyKeyboardMarkup, ReplyKeyboardRemove, ReplyParameters, User
 
-from modules.dict_types import TableDicts
+from modules.ttl_cache import TTLCache
+from modules.metrics import Metrics
+from modules.broadcast import Broadcaster
+from modules.conversation import ConversationStore
+from modules.dict_types import BroadcastDicts, ConversationDicts, TableDicts, TableRows, field_name
 from modules.sql_queries import Queries
 from utils import Utils
 
 class BotUtils:
-    def __init__(self, bot: TeleBot, queries: Queries, utils: Utils, logger: Logger):
+    def __init__(self, bot: TeleBot, queries: Queries, utils: Utils, logger: Logger, metrics: Metrics|None = None,
+                 conversations: ConversationStore|None = None):
         self.bot: TeleBot = bot
         self.queries: Queries = queries
         self.utils: Utils = utils
         self.logger: Logger = logger
+        self.metrics: Metrics = metrics or Metrics(logger, enabled=False)
+        self.broadcaster: Broadcaster = Broadcaster(logger)
+        self.chat_members: TTLCache[ChatMember] = TTLCache(ttl=300, negative_ttl=60)
+        self.chats: TTLCache[Chat] = TTLCache(ttl=3600, negative_ttl=60)
+        self.me: TTLCache[User] = TTLCache(ttl=86400)
+        self.conversations: ConversationStore = conversations if conversations is not None else ConversationStore(logger)
+        self.conversation_steps: dict[str, Callable[..., Any]] = {
+            "select_timetable_row": self.select_timetable_row,
+            "get_timetable_update": self.get_timetable_update,
+            "set_timetable_update": self.set_timetable_update,
+            "get_lesson_update": self.get_lesson_update,
+            "set_lesson_update": self.set_lesson_update,
+            "create_lesson": self.create_lesson
+        }
 
         self.member_statuses: list[str] = ["left", "member", "administrator", "creator"]
-        self.cancel_commands: list[str] = ["Відміна", "Відміна ⛔", "cancel", "/cancel", f"/cancel@{str(self.bot.get_me().username).lower()}"]
+        self.cancel_commands: list[str] = ["Відміна", "Відміна ⛔", "cancel", "/cancel"]
 
         self.bot_decorators = _BotDecorators(self)
 
 
-    def distribute(self, text: str, sticker_type: list[str]) -> None:
-        subscribed_users: list[TableDicts.UserDict] = self.queries.get_subscribed_users()
-        if len(subscribed_users) < 1:
+    def distribute(self, text: str, sticker_type: list[str], key: str, expires_at: datetime|None = None) -> None:
+        broadcast: TableDicts.BroadcastDict|None = self.queries.create_broadcast(key, text, self.queries.get_sticker_id(sticker_type), expires_at,
+                                                                                  self.utils.get_datetime().replace(tzinfo=None))
+        if broadcast is not None:
+            self.drain_broadcast(broadcast)
+
+    def drain_broadcast(self, broadcast: TableDicts.BroadcastDict, page_size: int = 200) -> None:
+        sticker_id: str|None = broadcast["sticker_id"]
+        messages: list[Callable[[int], Any]] = [lambda chat_id: self.bot.send_message(chat_id, broadcast["text"])]
+        if sticker_id is not None:
+            messages.append(lambda chat_id: self.bot.send_sticker(chat_id, sticker_id))
+        total: BroadcastDicts.ResultDict = {"sent": [], "failed": [], "unreachable": [], "duration": 0}
+        pages: Iterator[list[int]] = self.queries.iter_pending_chats(broadcast["id"], page_size)
+        context: contextvars.Context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox") as prefetcher:
+            next_page: Future[list[int]|None] = prefetcher.submit(context.run, next, pages, None)
+            while (page := next_page.result()) is not None:
+                next_page = prefetcher.submit(context.run, next, pages, None)
+                result: BroadcastDicts.ResultDict = self.broadcaster.broadcast(page, messages)
+                for status in ["sent", "failed", "unreachable"]:
+                    self.queries.set_outbox_status(broadcast["id"], result[status], status)
+                    total[status] += result[status]
+                total["duration"] += result["duration"]
+                for chat_id in result["unreachable"]:
+                    self.logger.warning(f"Знайден чат, в який не вдається відправити інформацію, він буде відписан. ID = {chat_id}!")
+        if len(total["sent"]) + len(total["failed"]) + len(total["unreachable"]) < 1:
             self.logger.warning("Ні у кого з користувачів вімкнена розсилка!")
             return
-        self.logger.info(f"Розсилка вімкнута у {len(subscribed_users)} користувачів.")
-        sticker_id: str = self.queries.get_sticker_id(sticker_type)
-        for user in subscribed_users:
-            try:
-                self.bot.send_message(user["id"], text)
-                self.bot.send_sticker(user["id"], sticker_id)
-            except ApiException:
-                self.logger.warning(f"Знайден чат, в який не вдається відправити інформацію, він буде відписан. ID = {user['id']}!")
-                self.queries.set_subscription(user["id"], False)
-        return
+        self.queries.set_subscriptions(total["unreachable"], False)
+        self.__record_metrics(total)
+        self.logger.info(f"Розсилка \"{broadcast['key']}\" завершена за {total['duration']:.2f} с: доставлено {len(total['sent'])}, "
+                         f"з помилкою {len(total['failed'])}, відписано {len(total['unreachable'])}.")
+
+    def __record_metrics(self, total: BroadcastDicts.ResultDict) -> None:
+        self.metrics.observe("broadcast_fanout_seconds", total["duration"])
+        for status in ["sent", "failed", "unreachable"]:
+            self.metrics.inc("broadcast_messages_total", len(total[status]), status=status)
+
+    def resume_distribution(self, date_time: datetime) -> None:
+        date_time = date_time.replace(tzinfo=None)
+        for broadcast in self.queries.get_pending_broadcasts():
+            if broadcast["expires_at"] is not None and broadcast["expires_at"] <= date_time:
+                self.logger.info(f"Розсилка \"{broadcast['key']}\" вже не актуальна, недоставлені повідомлення скасовано.")
+                self.queries.expire_broadcast(broadcast["id"])
+                continue
+            self.logger.info(f"Відновлення незавершеної розсилки \"{broadcast['key']}\".")
+            self.drain_broadcast(broadcast)
+        self.queries.prune_broadcasts(date_time)
+
+    def get_me(self) -> User:
+        return self.me.get("me", self.bot.get_me)
+
+    def get_chat(self, chat_id: int) -> Chat:
+        return self.chats.get(chat_id, lambda: self.bot.get_chat(chat_id), (ApiException,))
+
+    def get_chat_member(self, chat_id: int, user_id: int) -> ChatMember:
+        return self.chat_members.get((chat_id, user_id), lambda: self.bot.get_chat_member(chat_id, user_id), (ApiException,))
+
+    def invalidate_chat(self, chat_id: int, user_id: int|None = None) -> None:
+        self.chats.invalidate(chat_id)
+        if user_id is not None:
+            self.chat_members.invalidate((chat_id, user_id))
 
     def get_user_access(self, user_id: int) -> int:
         if os.environ.get("CREATOR_ID") == str(user_id):
@@ -48,60 +117,97 @@ class BotUtils:
             self.logger.critical("Головна група бота не знайдена! Будь ласка перевірте файл json та наявність бота (с запуском) у головній групі!")
             raise Exception("Main group chat not found!")
         try:
-            member_status: str = self.bot.get_chat_member(main_group_id, user_id).status
+            member_status: str = self.get_chat_member(main_group_id, user_id).status
         except ApiException:
             return 0
         return self.member_statuses.index(member_status)
 
-    def set_timetable_update(self, message: Message, column_name: str, weekday_id: int, ring_id: int, lessons: list[TableDicts.LessonDict]|None) -> None:
+    def expect(self, chat_id: int, user_id: int, step: str, column_name: str|None = None, weekday_id: int|None = None,
+               ring_id: int|None = None, lesson_id: int|None = None, message_id: int|None = None) -> None:
+        self.conversations.set(chat_id, user_id, {
+            "step": step,
+            "column_name": column_name,
+            "weekday_id": weekday_id,
+            "ring_id": ring_id,
+            "lesson_id": lesson_id,
+            "message_id": message_id
+        })
+
+    @staticmethod
+    def __sender_id(message: Message|InaccessibleMessage, user_id: int|None) -> int:
+        if user_id is not None:
+            return user_id
+        assert isinstance(message, Message) and message.from_user is not None
+        return message.from_user.id
+
+    def add_conversation_step(self, step: str, function: Callable[..., Any]) -> None:
+        self.conversation_steps[step] = function
+
+    def in_conversation(self, message: Message) -> bool:
+        if message.from_user is None:
+            return False
+        state: ConversationDicts.StateDict|None = self.conversations.get(message.chat.id, message.from_user.id)
+        if state is None:
+            return False
+        return state["message_id"] is None or (message.reply_to_message is not None and message.reply_to_message.message_id == state["message_id"])
+
+    def continue_conversation(self, message: Message) -> None:
+        assert message.from_user is not None
+        state: ConversationDicts.StateDict|None = self.conversations.pop(message.chat.id, message.from_user.id)
+        if state is None:
+            return
+        step: Callable[..., Any]|None = self.conversation_steps.get(state["step"])
+        if step is None:
+            self.logger.warning(f"Невідомий крок діалогу \"{state['step']}\", діалог скинуто.")
+            return
+        step(message, **{key: value for key, value in state.items() if key not in ("step", "message_id") and value is not None})
+
+    def __editable_lessons(self, column_name: str) -> list[TableRows.Lesson]:
+        lessons: list[TableRows.Lesson] = self.queries.get_lessons()
+        return lessons if column_name == "name" else lessons[1:]
+
+    def set_timetable_update(self, message: Message, column_name: str, weekday_id: int, ring_id: int) -> None:
         @self.bot_decorators.cancelable
         @self.bot_decorators.message_text_required
         def local_func(message: Message) -> None:
             assert isinstance(message.text, str)
-            if column_name == "remind" and lessons is None:
+            if column_name == "remind":
                 self.queries.update_timetable(weekday_id, ring_id, column_name, message.text if message.text.lower() != "видалити 🗑️" else None)
                 self.bot.reply_to(message, "Редагування <b>завершено</b>!", reply_markup=ReplyKeyboardRemove())
                 self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id("happy"))
-            elif isinstance(lessons, list) and column_name != "remind":
-                if message.text.lower() != "видалити 🗑️" or column_name == "lesson_id":
-                    selected_lesson: TableDicts.LessonDict|None = self.utils.find_dict(message.text, lessons, "name")
-                    if selected_lesson is None:
-                        self.bot.reply_to(message, "Зайняття з такою назвою не має в базі даних. Будь ласка оберайте варіанти користуючись кнопками! (Ще раз)")
-                        self.get_timetable_update(message, column_name, weekday_id, ring_id=ring_id)
-                    else:
-                        self.queries.update_timetable(weekday_id, ring_id, column_name, selected_lesson["id"])
-                        self.bot.reply_to(message, "Редагування <b>завершено</b>!", reply_markup=ReplyKeyboardRemove())
-                        self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id("happy"))
-                elif column_name != "lesson_id" and message.text.lower() == "видалити 🗑️":
-                    self.queries.update_timetable(weekday_id, ring_id, column_name, None)
+            elif message.text.lower() != "видалити 🗑️" or column_name == "lesson_id":
+                selected_lesson: TableRows.Lesson|None = self.utils.find_row(message.text, self.queries.get_lessons(), "name")
+                if selected_lesson is None:
+                    self.bot.reply_to(message, "Зайняття з такою назвою не має в базі даних. Будь ласка оберайте варіанти користуючись кнопками! (Ще раз)")
+                    self.get_timetable_update(message, column_name, weekday_id, ring_id=ring_id)
+                else:
+                    self.queries.update_timetable(weekday_id, ring_id, column_name, selected_lesson.id)
                     self.bot.reply_to(message, "Редагування <b>завершено</b>!", reply_markup=ReplyKeyboardRemove())
                     self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id("happy"))
-                else:
-                    raise ValueError
             else:
-                raise ValueError
+                self.queries.update_timetable(weekday_id, ring_id, column_name, None)
+                self.bot.reply_to(message, "Редагування <b>завершено</b>!", reply_markup=ReplyKeyboardRemove())
+                self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id("happy"))
         return local_func(message)
 
-    def get_timetable_update(self, message: Message, column_name: str, weekday_id: int, rings: list[TableDicts.RingDict]|None = None, ring_id: int|None = None) -> None:
+    def get_timetable_update(self, message: Message, column_name: str, weekday_id: int, ring_id: int|None = None) -> None:
         @self.bot_decorators.cancelable
         @self.bot_decorators.message_text_required
         def local_func(message: Message) -> None:
-            assert isinstance(message.text, str)
-            if ring_id is None and rings is not None:
+            assert isinstance(message.text, str) and message.from_user is not None
+            if ring_id is None:
                 selected_id: str = message.text.split(')', 1)[0]
-                selected_ring: TableDicts.RingDict|None = self.utils.find_dict(int(selected_id), rings, "id") if selected_id.isdigit() else None
+                selected_ring: TableRows.Ring|None = self.utils.find_row(int(selected_id), self.queries.get_rings(), "id") if selected_id.isdigit() else None
                 if selected_ring is None:
                     self.bot.reply_to(message, "Такого номера зайняття не має в базі даних. Будь ласка оберайте варіанти користуючись кнопками! (Ще раз)")
                     self.select_timetable_row(message, column_name, weekday_id=weekday_id)
                     return
-                selected_ring_id: int = selected_ring["id"]
-            elif isinstance(ring_id, int):
-                selected_ring_id = ring_id
+                selected_ring_id: int = selected_ring.id
             else:
-                raise ValueError
+                selected_ring_id = ring_id
 
-            timetable_row: TableDicts.TimetableDict|None = self.queries.get_timetable_row(weekday_id, selected_ring_id)
-            assert isinstance(timetable_row, dict)
+            timetable_row: TableRows.Timetable|None = self.queries.get_timetable_row(weekday_id, selected_ring_id)
+            assert timetable_row is not None
             old_value: str|None = None
             markup = ReplyKeyboardMarkup(row_width=1)
             markup.add(self.cancel_commands[1])
@@ -109,87 +215,69 @@ class BotUtils:
                 markup.add("Видалити 🗑️")
             if column_name == "remind":
                 markup.input_field_placeholder = "Нове нагадування..."
-                old_value = timetable_row[column_name]
-                self.bot.register_next_step_handler(
-                    self.bot.reply_to(message, f"<b>Зараз</b> нагадування:\n{old_value or 'Нагадування немає'}\n\nНапішіть <b>нове</b> нагадування:", 
-                                      reply_markup=markup),
-                    self.set_timetable_update,
-                    column_name=column_name, weekday_id=weekday_id, ring_id=selected_ring_id, lessons=None
-                )
-                return
+                old_value = getattr(timetable_row, column_name)
+                self.bot.reply_to(message, f"<b>Зараз</b> нагадування:\n{old_value or 'Нагадування немає'}\n\nНапішіть <b>нове</b> нагадування:", 
+                                  reply_markup=markup)
             else:
-                old_value = self.queries.get_lesson(timetable_row[column_name])["name"] if timetable_row[column_name] is not None else None
-                lessons: list[TableDicts.LessonDict] = self.queries.get_lessons()
-                markup.add(*[lesson["name"] for lesson in lessons])
-                self.bot.register_next_step_handler(
-                    self.bot.reply_to(message, f"<b>Зараз</b> задано зайняття:\n{old_value or 'Зайняття немає'}\n\n<b>Оберіть нове</b> зайняття:", 
-                                      reply_markup=markup),
-                    self.set_timetable_update,
-                    column_name=column_name, weekday_id=weekday_id, ring_id=selected_ring_id, lessons=lessons
-                )
+                old_value = self.queries.get_lesson(getattr(timetable_row, column_name)).name if getattr(timetable_row, column_name) is not None else None
+                markup.add(*[lesson.name for lesson in self.queries.get_lessons()])
+                self.bot.reply_to(message, f"<b>Зараз</b> задано зайняття:\n{old_value or 'Зайняття немає'}\n\n<b>Оберіть нове</b> зайняття:", 
+                                  reply_markup=markup)
+            self.expect(message.chat.id, message.from_user.id, "set_timetable_update", column_name=column_name, weekday_id=weekday_id, ring_id=selected_ring_id)
         return local_func(message)
 
-    def select_timetable_row(self, message: Message, column_name: str, weekdays: list[TableDicts.WeekdayDict]|None = None, weekday_id: int|None = None) -> None:
+    def select_timetable_row(self, message: Message, column_name: str, weekday_id: int|None = None) -> None:
         @self.bot_decorators.cancelable
         @self.bot_decorators.message_text_required
         def local_func(message: Message) -> None:
-            assert isinstance(message.text, str)
-            if weekday_id is None and weekdays is not None:
-                selected_weekday: TableDicts.WeekdayDict|None = self.utils.find_dict(message.text.split(' ', 1)[0] if column_name == "weekday" else message.text, weekdays, "name")
+            assert isinstance(message.text, str) and message.from_user is not None
+            weekdays: list[TableRows.Weekday] = self.queries.get_weekdays()
+            if weekday_id is None:
+                selected_weekday: TableRows.Weekday|None = self.utils.find_row(message.text.split(' ', 1)[0] if column_name == "weekday" else message.text, weekdays, "name")
                 if selected_weekday is None:
                     self.bot.reply_to(message, "Такого дня тижня не має в базі даних. Будь ласка оберайте варіанти користуючись кнопками! (Ще раз)")
                     self.edit_timetable(message, column_name)
                     return
-                selected_weekday_id: int = selected_weekday["id"]
-            elif isinstance(weekday_id, int):
-                selected_weekday_id = weekday_id
+                selected_weekday_id: int = selected_weekday.id
             else:
-                raise ValueError
+                selected_weekday_id = weekday_id
 
             if column_name == "weekday":
-                if isinstance(weekdays, list):
-                    self.queries.update_weekday(selected_weekday_id, bool((weekdays[selected_weekday_id - 1]["is_work_day"] + 1) % 2))
-                    self.bot.reply_to(message, "Редагування <b>завершено</b>!", reply_markup=ReplyKeyboardRemove())
-                    self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id("happy"))
-                else:
-                    raise ValueError
+                self.queries.update_weekday(selected_weekday_id, bool((weekdays[selected_weekday_id - 1].is_work_day + 1) % 2))
+                self.bot.reply_to(message, "Редагування <b>завершено</b>!", reply_markup=ReplyKeyboardRemove())
+                self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id("happy"))
             else:
                 markup = ReplyKeyboardMarkup(row_width=1)
                 markup.add(self.cancel_commands[1])
-                rings: list[TableDicts.RingDict] = self.queries.get_rings()
-                for ring in rings:
-                    timetable_row: TableDicts.TimetableDict|None = self.queries.get_timetable_row(selected_weekday_id, ring["id"])
-                    if timetable_row is None:
-                        markup.add(f"{ring['id']}) Не знайдено (помилка заповнення бази даних)")
+                day: dict[int, TableRows.Day] = self.queries.get_day_timetable(selected_weekday_id)
+                empty_lesson_name: str = self.queries.get_lesson(1).name
+                for ring in self.queries.get_rings():
+                    timetable_row: TableRows.Day|None = day.get(ring.id)
+                    if timetable_row is None or timetable_row.lesson is None:
+                        markup.add(f"{ring.id}) Не знайдено (помилка заповнення бази даних)")
                         continue
                     markup.add(
-                        f"{ring['id']}) {self.queries.get_lesson(timetable_row['lesson_id'])['name']} / "
-                        f"{self.queries.get_lesson(timetable_row['flasher_id'] or 1)['name']} "
-                        f"(заміна: {self.queries.get_lesson(timetable_row['replacement_id'] or 1)['name']})"
+                        f"{ring.id}) {timetable_row.lesson.name} / "
+                        f"{timetable_row.flasher.name if timetable_row.flasher is not None else empty_lesson_name} "
+                        f"(заміна: {timetable_row.replacement.name if timetable_row.replacement is not None else empty_lesson_name})"
                     )
-                self.bot.register_next_step_handler(
-                    self.bot.reply_to(message, "<b>Оберіть</b> номер зайняття:", reply_markup=markup),
-                    self.get_timetable_update,
-                    column_name=column_name, weekday_id=selected_weekday_id, rings=rings
-                )
+                self.bot.reply_to(message, "<b>Оберіть</b> номер зайняття:", reply_markup=markup)
+                self.expect(message.chat.id, message.from_user.id, "get_timetable_update", column_name=column_name, weekday_id=selected_weekday_id)
         return local_func(message)
 
-    def edit_timetable(self, message: Message|InaccessibleMessage, column_name: str) -> None:
+    def edit_timetable(self, message: Message|InaccessibleMessage, column_name: str, user_id: int|None = None) -> None:
         @self.bot_decorators.cancelable
         def local_func(message: Message|InaccessibleMessage) -> None:
-            weekdays: list[TableDicts.WeekdayDict] = self.queries.get_weekdays()
+            weekdays: list[TableRows.Weekday] = self.queries.get_weekdays()
             markup = ReplyKeyboardMarkup(row_width=1)
             markup.add(self.cancel_commands[1])
             if column_name == "weekday":
-                markup.add(*[weekday["name"] + (" (Рабочий)" if weekday["is_work_day"] else " (Вихідний)") for weekday in weekdays])
+                markup.add(*[weekday.name + (" (Рабочий)" if weekday.is_work_day else " (Вихідний)") for weekday in weekdays])
             else:
-                markup.add(*[weekday["name"] for weekday in weekdays])
-            self.bot.register_next_step_handler(
-                self.bot.send_message(message.chat.id, "<b>Оберіть</b> день тиждня:", 
-                                      reply_markup=markup, reply_parameters=ReplyParameters(message.id) if message.id else None),
-                self.select_timetable_row,
-                column_name=column_name, weekdays=weekdays
-            )
+                markup.add(*[weekday.name for weekday in weekdays])
+            self.bot.send_message(message.chat.id, "<b>Оберіть</b> день тиждня:", 
+                                  reply_markup=markup, reply_parameters=ReplyParameters(message.id) if message.id else None)
+            self.expect(message.chat.id, self.__sender_id(message, user_id), "select_timetable_row", column_name=column_name)
         return local_func(message)
 
     def set_lesson_update(self, message: Message, column_name: str, lesson_id: int) -> None:
@@ -218,22 +306,20 @@ class BotUtils:
             self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id("happy"))
         return local_func(message)
 
-    def get_lesson_update(self, message: Message, column_name: str, lessons: list[TableDicts.LessonDict]|None = None, lesson_id: int|None = None) -> None:
+    def get_lesson_update(self, message: Message, column_name: str, lesson_id: int|None = None) -> None:
         @self.bot_decorators.cancelable
         @self.bot_decorators.message_text_required
         def local_func(message: Message) -> None:
-            if isinstance(lessons, list):
-                assert message.text is not None
-                selected_lesson: TableDicts.LessonDict|None = self.utils.find_dict(message.text, lessons, "name")
+            assert message.text is not None and message.from_user is not None
+            if lesson_id is None:
+                selected_lesson: TableRows.Lesson|None = self.utils.find_row(message.text, self.__editable_lessons(column_name), "name")
                 if selected_lesson is None:
                     self.bot.reply_to(message, "Такого заняття не має в базі даних. Будь ласка оберайте варіанти користуючись кнопками! (Ще раз)")
                     self.edit_lesson(message, column_name)
                     return
-                selected_lesson_id: int = selected_lesson["id"]
-            elif isinstance(lesson_id, int):
-                selected_lesson_id = lesson_id
+                selected_lesson_id: int = selected_lesson.id
             else:
-                raise ValueError
+                selected_lesson_id = lesson_id
 
             if column_name == "delete":
                 self.queries.delete_lesson(selected_lesson_id)
@@ -241,58 +327,46 @@ class BotUtils:
                 self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id("happy"))
                 return
 
-            old_value: str|int|None = self.queries.get_lesson(selected_lesson_id)[column_name]
+            old_value: str|int|None = getattr(self.queries.get_lesson(selected_lesson_id), field_name(column_name))
             markup = ReplyKeyboardMarkup(row_width=1)
             markup.add(self.cancel_commands[1])
             if column_name != "name":
                 markup.add("Видалити 🗑️")
-            self.bot.register_next_step_handler(
-                self.bot.reply_to(message, f"<b>Зараз</b> задано значення:\n{old_value if old_value is not None else 'Значення не задано'}\n\n<b>Напішіть нове</b> значення:", 
-                                    reply_markup=markup),
-                self.set_lesson_update,
-                column_name=column_name, lesson_id=selected_lesson_id
-            )
+            self.bot.reply_to(message, f"<b>Зараз</b> задано значення:\n{old_value if old_value is not None else 'Значення не задано'}\n\n<b>Напішіть нове</b> значення:", 
+                              reply_markup=markup)
+            self.expect(message.chat.id, message.from_user.id, "set_lesson_update", column_name=column_name, lesson_id=selected_lesson_id)
         return local_func(message)
 
-    def create_lesson(self, message: Message, column_name: str, lessons: list[TableDicts.LessonDict]) -> None:
+    def create_lesson(self, message: Message, column_name: str) -> None:
         @self.bot_decorators.cancelable
         @self.bot_decorators.message_text_required
         def local_func(message: Message) -> None:
             assert message.text is not None
-            found_lesson: TableDicts.LessonDict|None = self.utils.find_dict(message.text, lessons, "name")
+            found_lesson: TableRows.Lesson|None = self.utils.find_row(message.text, self.__editable_lessons(column_name), "name")
             if found_lesson is not None:
                 self.bot.reply_to(message, "Заняття з даною назвою вже існує! (введіть назву для <b>нового</b> заняття)")
                 self.edit_lesson(message, column_name)
                 return
-            self.queries.create_lesson({"id": 1, "name": message.text, "link": None, "class": None, "max_grade": None})
+            self.queries.create_lesson(message.text)
             self.bot.reply_to(message, "Зараз створен шаблон заняття. <b>Ви зможете видалити або змінти це заняття через редактор.</b>",
                               reply_markup=ReplyKeyboardRemove())
             self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id("happy"))
         return local_func(message)
 
-    def edit_lesson(self, message: Message|InaccessibleMessage, column_name: str) -> None:
+    def edit_lesson(self, message: Message|InaccessibleMessage, column_name: str, user_id: int|None = None) -> None:
         @self.bot_decorators.cancelable
         def local_func(message: Message|InaccessibleMessage) -> None:
-            lessons: list[TableDicts.LessonDict] = self.queries.get_lessons()
-            if column_name != "name":
-                lessons.pop(0)
             markup = ReplyKeyboardMarkup(row_width=1)
             markup.add(self.cancel_commands[1])
             if column_name == "create":
-                self.bot.register_next_step_handler(
                 self.bot.send_message(message.chat.id, "<b>Введіть назву</b> для <b>нового</b> заняття:", 
-                                      reply_parameters=ReplyParameters(message.id) if message.id else None, reply_markup=markup),
-                self.create_lesson,
-                column_name=column_name, lessons=lessons
-                )
+                                      reply_parameters=ReplyParameters(message.id) if message.id else None, reply_markup=markup)
+                self.expect(message.chat.id, self.__sender_id(message, user_id), "create_lesson", column_name=column_name)
                 return
-            markup.add(*[lesson["name"] for lesson in lessons])
-            self.bot.register_next_step_handler(
-                self.bot.send_message(message.chat.id, "<b>Оберіть</b> заняття:", 
-                                      reply_markup=markup, reply_parameters=ReplyParameters(message.id) if message.id else None),
-                self.get_lesson_update,
-                column_name=column_name, lessons=lessons
-            )
+            markup.add(*[lesson.name for lesson in self.__editable_lessons(column_name)])
+            self.bot.send_message(message.chat.id, "<b>Оберіть</b> заняття:", 
+                                  reply_markup=markup, reply_parameters=ReplyParameters(message.id) if message.id else None)
+            self.expect(message.chat.id, self.__sender_id(message, user_id), "get_lesson_update", column_name=column_name)
         return local_func(message)
 
 class _BotDecorators:
@@ -322,7 +396,7 @@ class _BotDecorators:
         def wrap(message: Message|InaccessibleMessage, *args, **kwargs):
             if message.text is None:
                 return cancelable_function(message, *args, **kwargs)
-            for cancel_command in self.bot_utils.cancel_commands:
+            for cancel_command in self.bot_utils.cancel_commands + [f"/cancel@{str(self.bot_utils.get_me().username).lower()}"]:
                 if message.text.lower() == cancel_command.lower():
                     self.bot_utils.bot.send_message(message.chat.id, "<b>Відмінено</b>!", 
                                                     reply_markup=ReplyKeyboardRemove(), reply_parameters=ReplyParameters(message.id) if message.id else None)
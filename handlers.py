@@ -0,0 +1,246 @@
+from datetime import date, timedelta
+from typing import Any, Callable
+
+from telebot import TeleBot, types, util
+from telebot.types import BotCommand, CallbackQuery, ChatMemberUpdated, Message, ReplyKeyboardMarkup, ReplyKeyboardRemove, InlineKeyboardMarkup, InlineKeyboardButton
+
+from bot_utils import BotUtils
+from utils import Utils
+from modules.sql_queries import Queries, TableRows
+from modules.timetable import Timetable, TimetableDicts
+
+bot_commands: list[BotCommand] = [
+    BotCommand("start", "Перезапустити бота"),
+    BotCommand("subscription", "Керувати підпискою на розсилку"),
+    BotCommand("rings", "Переглянути розклад дзвінків"),
+    BotCommand("today", "Переглянути розклад на сьогодні"),
+    BotCommand("tomorrow", "Переглянути розклад на завтра"),
+    BotCommand("timetable", "Переглянути розклад занять на тиждень"),
+    BotCommand("current_lesson", "Знайти зайняття яке проходить зараз"),
+    BotCommand("get_lesson", "Отримати посилання на заняття"),
+    BotCommand("cancel", "Відмінити дію"),
+]
+scoped_commands: list[tuple[list[BotCommand], types.BotCommandScope]] = [
+    (bot_commands, types.BotCommandScopeDefault()),
+    (bot_commands + [BotCommand("editor", "Відредагувати розклад")], types.BotCommandScopeAllPrivateChats())
+]
+
+class Handlers:
+    def __init__(self, bot: TeleBot, queries: Queries, timetable: Timetable, utils: Utils, bot_utils: BotUtils):
+        self.bot: TeleBot = bot
+        self.queries: Queries = queries
+        self.timetable: Timetable = timetable
+        self.utils: Utils = utils
+        self.bot_utils: BotUtils = bot_utils
+        self.bot_utils.add_conversation_step("get_lesson", self.get_lesson)
+
+    def registrations(self) -> list[tuple[str, Callable[..., Any], dict[str, Any]]]:
+        return [
+            ("message", self.conversation_msg, {"func": self.bot_utils.in_conversation, "content_types": util.content_type_media}),
+            ("message", self.subscription_msg, {"commands": ["subscription"]}),
+            ("message", self.set_subscription_msg, {"commands": ["subscribe", "unsubscribe"]}),
+            ("message", self.private_start_msg, {"commands": ["start"], "chat_types": ["private"]}),
+            ("message", self.group_start_msg, {"commands": ["start"], "chat_types": ["group", "supergroup"]}),
+            ("message", self.chat_update_msg, {"content_types": ["new_chat_title", "new_chat_members", "left_chat_member"]}),
+            ("chat_member", self.chat_member_update, {}),
+            ("my_chat_member", self.my_chat_member_update, {}),
+            ("message", self.rings_msg, {"commands": ["rings"]}),
+            ("message", self.timetable_msg, {"commands": ["timetable"]}),
+            ("message", self.today_msg, {"commands": ["today"]}),
+            ("message", self.tomorrow_msg, {"commands": ["tomorrow"]}),
+            ("message", self.current_lesson_msg, {"commands": ["current_lesson"]}),
+            ("message", self.get_lesson_msg, {"commands": ["get_lesson"]}),
+            ("message", self.cancel_msg, {"commands": ["cancel"]}),
+            ("message", self.editor_msg, {"commands": ["editor"], "chat_types": ["private"]}),
+            ("callback_query", self.callback_handler, {"func": lambda _: True})
+        ]
+
+    def register(self, bot: Any, wrap: Callable[[Callable[..., Any]], Callable[..., Any]] = lambda handler: handler) -> None:
+        for kind, handler, filters in self.registrations():
+            if "func" in filters:
+                filters = filters | {"func": wrap(filters["func"])}
+            getattr(bot, f"register_{kind}_handler")(wrap(handler), **filters)
+
+    def conversation_msg(self, message: Message):
+        self.bot_utils.continue_conversation(message)
+
+    def subscription_msg(self, message: Message):
+        markup = InlineKeyboardMarkup()
+        markup.add(InlineKeyboardButton("🔔 Підписатися", callback_data="subscription /subscribe"), InlineKeyboardButton("🔕 Відписатися", callback_data="subscription /unsubscribe"))
+        self.bot.reply_to(message,
+            "<b>Підписка на розсилку</b>\n\nЦя команда керує розсилкою сповіщень у цьому чаті.\n\n"
+            "<b><i>Розсилка – це повідомлення про початок та кінець кожного заняття, яке є в розкладі.</i></b>\n\n"
+            "Я надсилатиму тобі:\n• назву заняття;\n• посилання на клас;\n• посилання на саме заняття.\n\n"
+            "Якщо на занятті заплановане щось важливе, адміністратори можуть додати нагадування — і я теж його надішлю.\n\n"
+            "<i>Сповіщення приходять за три хвилини до початку заняття.\nА після завершення я одразу повідомлю назву наступного та час його проведення.</i>",
+            reply_markup=markup
+        )
+
+    def set_subscription_msg(self, message: Message) -> str:
+        subscription: bool = True if message.text == "/subscribe" else False
+        try:
+            self.queries.set_subscription(message.chat.id, subscription)
+            reply_text: str = "Ви підписані на розсилку! ლ(╹◡╹ლ)" if subscription else "Ви відписані від розсилки! ┗( T﹏T )┛"
+            self.bot.reply_to(message, reply_text)
+            return reply_text
+        except:
+            self.bot.reply_to(message, "Не вдалося змінити значення підписки в БД.")
+            return "Помилка в БД, не вдалося змінити значення підписки"
+
+    def private_start_msg(self, message: Message):
+        assert message.from_user is not None
+        self.bot.reply_to(message, f"<b><i>Вітаю, {message.from_user.first_name}!</i></b>\n(p≧w≦q)")
+        if self.queries.is_new_user(message.from_user.id):
+            self.subscription_msg(message)
+        self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["happy", "study"]), disable_notification=True)
+
+    def group_start_msg(self, message: Message):
+        chat_title: str|None = self.bot_utils.get_chat(message.chat.id).title
+        self.bot.reply_to(message, f"<b><i>Вітаю, {chat_title}!</i></b>\n(p≧w≦q)")
+        if self.queries.is_new_user(message.chat.id):
+            self.subscription_msg(message)
+        if self.utils.is_main_group(chat_title, message.chat.id):
+            self.bot.send_message(message.chat.id, "Ви моя основна група! Усі адміни цієї групи одразу є моїми адмінами (´▽`ʃ♡ƪ)")
+        self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["study", "happy"]), disable_notification=True)
+
+    def chat_update_msg(self, message: Message):
+        self.bot_utils.invalidate_chat(message.chat.id)
+        for user in (message.new_chat_members or []) + ([message.left_chat_member] if message.left_chat_member else []):
+            self.bot_utils.invalidate_chat(message.chat.id, user.id)
+
+    def chat_member_update(self, update: ChatMemberUpdated):
+        self.bot_utils.invalidate_chat(update.chat.id, update.new_chat_member.user.id)
+
+    def my_chat_member_update(self, update: ChatMemberUpdated):
+        self.bot_utils.invalidate_chat(update.chat.id, update.new_chat_member.user.id)
+
+    def rings_msg(self, message: Message):
+        self.bot.reply_to(message, self.timetable.get_rings_timetable(), disable_notification=True)
+        self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["study", "lovely"]), disable_notification=True)
+
+    def timetable_msg(self, message: Message):
+        self.bot.reply_to(message, self.timetable.get_week_timetable(), disable_notification=True)
+        self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["study", "lovely"]), disable_notification=True)
+
+    def today_msg(self, message: Message):
+        self.bot.reply_to(message, self.timetable.get_timetable(self.utils.get_datetime().date(), True), disable_notification=True)
+        self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["study", "lovely"]), disable_notification=True)
+
+    def tomorrow_msg(self, message: Message):
+        today: date = self.utils.get_datetime().date()
+        next_work_day: TableRows.Weekday|None = self.timetable.get_next_workday(today.weekday())
+        if next_work_day is not None:
+            if (today + timedelta(days=1)).isoweekday() != next_work_day.id:
+                self.bot.reply_to(message, "Завтра <b>вихідний</b>, наступний <b>день для навчання</b> буде:")
+            self.bot.reply_to(message,
+                self.timetable.get_timetable(today + timedelta(days=((next_work_day.id - today.isoweekday()) % 7 or 7)), True),
+                disable_notification=True
+            )
+        else:
+            self.bot.reply_to(message, "Не знайдено жодного робочого дня, <b>скоріше за все у вас канікули</b>! \n（￣︶￣）", disable_notification=True)
+        self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["study", "lovely"]), disable_notification=True)
+
+    def current_lesson_msg(self, message: Message):
+        current_lesson: TimetableDicts.FoundLessonDict|str = self.timetable.find_lesson(self.utils.get_datetime())
+        if isinstance(current_lesson, str):
+            self.bot.reply_to(message, current_lesson)
+            self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["happy", "lovely", "service"]), disable_notification=True)
+        else:
+            if current_lesson["lesson"] is None:
+                self.bot.reply_to(message, "Скоріш за все, зараз немає заняття, хоч за розкладом дзвінков воно і має бути \n┗( T﹏T )┛")
+            elif current_lesson["lesson"]["lesson_id"] == 1:
+                self.bot.reply_to(message, "Зараз немає заняття, можна відпочити!\n(☆▽☆)")
+                self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["happy", "lovely", "service"]), disable_notification=True)
+            else:
+                self.bot.reply_to(message,
+                    f"<b>З {current_lesson['ring'].start.strftime('%H:%M')} по {current_lesson['ring'].end.strftime('%H:%M')}:</b> "
+                    f"{current_lesson['lesson']['name']}{current_lesson['lesson']['link']}" + (current_lesson["lesson"]["remind"] or "")
+                )
+                self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["sad", "study", "service"]), disable_notification=True)
+
+    def get_lesson(self, message: Message) -> None:
+        @self.bot_utils.bot_decorators.cancelable
+        @self.bot_utils.bot_decorators.message_text_required
+        def local_func(message: Message) -> None:
+            selected_lesson: TableRows.Lesson|None = self.utils.find_row(message.text, self.queries.get_lessons()[1:], "name")
+            if selected_lesson is None:
+                self.bot.reply_to(message, "Такого заняття немає в базі даних!", reply_markup=ReplyKeyboardRemove())
+                return
+            lesson: TimetableDicts.LessonDict = self.timetable.get_normilized_lesson(lesson=selected_lesson, flasher=None)
+            self.bot.reply_to(message, f"{lesson['name']}{lesson['link']}", reply_markup=ReplyKeyboardRemove())
+            self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["sad", "study", "service"]), disable_notification=True)
+        return local_func(message)
+
+    def get_lesson_msg(self, message: Message):
+        assert message.from_user is not None
+        markup = ReplyKeyboardMarkup(row_width=1, input_field_placeholder="Оберіть назву заняття...", selective=True)
+        markup.add(self.bot_utils.cancel_commands[1])
+        markup.add(*[lesson.name for lesson in self.queries.get_lessons()[1:]])
+        msg: Message = self.bot.reply_to(message, "Оберіть назву заняття:", reply_markup=markup)
+        self.bot_utils.expect(message.chat.id, message.from_user.id, "get_lesson", message_id=msg.message_id if message.chat.type != "private" else None)
+
+    def cancel_msg(self, message: Message):
+        @self.bot_utils.bot_decorators.cancelable
+        def local_func(_: Message) -> None:
+            ...
+        return local_func(message)
+
+    def editor_msg(self, message: Message):
+        @self.bot_utils.bot_decorators.access_required(["administrator", "creator"])
+        def local_func(message: Message) -> None:
+            markup = InlineKeyboardMarkup(row_width=3)
+            markup.row(InlineKeyboardButton("ℹ️ Розклад ⬇️", callback_data="None"))
+            markup.row(
+                InlineKeyboardButton("Основні заняття", callback_data="editor timetable lesson_id"),
+                InlineKeyboardButton("Мігалки", callback_data="editor timetable flasher_id"),
+                InlineKeyboardButton("Заміни", callback_data="editor timetable replacement_id")
+            )
+            markup.add(InlineKeyboardButton("Нагадування", callback_data="editor timetable remind"))
+            markup.add(InlineKeyboardButton("Зробити день робочим/вихідним", callback_data="editor timetable weekday"))
+
+            markup.add(InlineKeyboardButton("ℹ️ Заняття ⬇️", callback_data="None"))
+            markup.add(InlineKeyboardButton("Назву", callback_data="editor lesson name"))
+            markup.row(
+                InlineKeyboardButton("Посилання на заняття", callback_data="editor lesson link"),
+                InlineKeyboardButton("Посилання на клас", callback_data="editor lesson class")
+            )
+            markup.add(InlineKeyboardButton("Максимальний бал", callback_data="editor lesson max_grade"))
+            markup.row(
+                InlineKeyboardButton("Створити нове", callback_data="editor lesson create"),
+                InlineKeyboardButton("Видалити існуюче", callback_data="editor lesson delete")
+            )
+
+            self.bot.reply_to(message, "Що будемо редагувати?", reply_markup=markup)
+            self.bot.send_sticker(message.chat.id, self.queries.get_sticker_id(["lovely", "service", "happy"]))
+        return local_func(message)
+
+    def callback_handler(self, callback: CallbackQuery):
+        if callback.data is None:
+            return
+        if callback.data == "None":
+            self.bot.answer_callback_query(callback.id, text="Ці кнопки для відображення тексту, вони не виконують ніяких функцій!", show_alert=True)
+            return
+        command, options = callback.data.split(' ', 1)
+        match command:
+            case "editor":
+                request_type, target = options.split(' ', 1)
+                match request_type:
+                    case "timetable":
+                        self.bot_utils.edit_timetable(callback.message, target, callback.from_user.id)
+                        self.bot.answer_callback_query(callback.id, text="Віддано на обробку!\nОчікуйте повідомлення з інструкціями!", show_alert=False)
+                    case "lesson":
+                        self.bot_utils.edit_lesson(callback.message, target, callback.from_user.id)
+                        self.bot.answer_callback_query(callback.id, text="Віддано на обробку!\nОчікуйте повідомлення з інструкціями!", show_alert=False)
+                    case _:
+                        self.bot.answer_callback_query(callback.id, text="Кнопка не знайдена Помилка!", show_alert=True)
+                        return
+            case "subscription":
+                callback.message.text = options
+                self.bot.answer_callback_query(callback.id, text=self.set_subscription_msg(callback.message), show_alert=False)
+                return
+            case _:
+                self.bot.answer_callback_query(callback.id, text="Кнопка не знайдена Помилка!", show_alert=True)
+                return
+
+if __name__ == "__main__":
+    exit()
@@ -0,0 +1,56 @@
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Iterable
+
+from telebot.asyncio_helper import ApiException
+
+from .broadcast import TokenBucket, _RateLimiter
+from .dict_types import BroadcastDicts
+
+class AsyncBroadcaster(_RateLimiter):
+    def __init__(self, logger: logging.Logger, workers: int = 32, rate: float = 30, group_rate: float = 20 / 60, max_retries: int = 3):
+        super().__init__(logger, rate, group_rate, max_retries)
+        self.workers: int = workers
+
+    @staticmethod
+    async def __acquire(bucket: TokenBucket) -> None:
+        while (delay := bucket.reserve()) > 0:
+            await asyncio.sleep(delay)
+
+    async def __send(self, semaphore: asyncio.Semaphore, chat_id: int, messages: list[Callable[[int], Awaitable[Any]]]) -> bool|None:
+        group_bucket: TokenBucket|None = self._get_group_bucket(chat_id)
+        async with semaphore:
+            for index, message in enumerate(messages):
+                for attempt in range(self.max_retries + 1):
+                    await self.__acquire(self.bucket)
+                    if group_bucket is not None:
+                        await self.__acquire(group_bucket)
+                    try:
+                        await message(chat_id)
+                        break
+                    except ApiException as error:
+                        retry: bool|None = self._handle_error(chat_id, error, attempt)
+                        if not retry:
+                            return self._give_up(chat_id, retry, index)
+        return True
+
+    async def broadcast(self, chat_ids: Iterable[int], messages: list[Callable[[int], Awaitable[Any]]]) -> BroadcastDicts.ResultDict:
+        started: float = time.monotonic()
+        result: BroadcastDicts.ResultDict = {"sent": [], "failed": [], "unreachable": [], "duration": 0}
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(self.workers)
+        chat_ids = list(chat_ids)
+        outcomes: list[bool|None|BaseException] = await asyncio.gather(
+            *[self.__send(semaphore, chat_id, messages) for chat_id in chat_ids], return_exceptions=True
+        )
+        for chat_id, delivered in zip(chat_ids, outcomes):
+            if isinstance(delivered, BaseException):
+                self.logger.error(f"Помилка під час розсилки в чат {chat_id}: \"{delivered}\"")
+                delivered = False
+            self._collect(result, chat_id, delivered)
+        self._prune_group_buckets()
+        result["duration"] = time.monotonic() - started
+        return result
+
+if __name__ == "__main__":
+    exit()
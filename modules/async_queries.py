@@ -0,0 +1,70 @@
+import asyncio
+import contextvars
+from datetime import date, datetime
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+
+from .sql_queries import Queries
+from .snapshot import TimetableSnapshot
+from .dict_types import TableDicts, TableRows
+
+_Result = TypeVar("_Result")
+
+class AsyncQueries:
+    def __init__(self, queries: Queries, workers: int = 5):
+        self.queries: Queries = queries
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+
+    async def run(self, function: Callable[..., _Result], *args: Any, **kwargs: Any) -> _Result:
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, partial(contextvars.copy_context().run, function, *args, **kwargs))
+
+    async def snapshot(self) -> TimetableSnapshot:
+        return await self.run(self.queries.snapshot)
+
+    async def is_new_user(self, user_id: int) -> bool:
+        return await self.run(self.queries.is_new_user, user_id)
+
+    async def set_subscription(self, user_id: int, is_subscriber: bool) -> None:
+        await self.run(self.queries.set_subscription, user_id, is_subscriber)
+
+    async def set_subscriptions(self, user_ids: list[int], is_subscriber: bool) -> None:
+        await self.run(self.queries.set_subscriptions, user_ids, is_subscriber)
+
+    async def get_lessons(self) -> list[TableRows.Lesson]:
+        return await self.run(self.queries.get_lessons)
+
+    async def get_sticker_id(self, sticker_type: list[str]|str) -> str:
+        return await self.run(self.queries.get_sticker_id, sticker_type)
+
+    async def clean_replacement_and_remind(self, weekday_id: int, ring_id: int) -> None:
+        await self.run(self.queries.clean_replacement_and_remind, weekday_id, ring_id)
+
+    async def reset_days(self, reset_date: date, weekday_ids: list[int]) -> bool:
+        return await self.run(self.queries.reset_days, reset_date, weekday_ids)
+
+    async def create_broadcast(self, key: str, text: str, sticker_id: str|None, expires_at: datetime|None, created_at: datetime) -> TableDicts.BroadcastDict|None:
+        return await self.run(self.queries.create_broadcast, key, text, sticker_id, expires_at, created_at)
+
+    async def get_pending_broadcasts(self) -> list[TableDicts.BroadcastDict]:
+        return await self.run(self.queries.get_pending_broadcasts)
+
+    async def iter_pending_chats(self, broadcast_id: int, page_size: int = 1000) -> AsyncIterator[list[int]]:
+        pages: Iterator[list[int]] = self.queries.iter_pending_chats(broadcast_id, page_size)
+        while (page := await self.run(next, pages, None)) is not None:
+            yield page
+
+    async def set_outbox_status(self, broadcast_id: int, chat_ids: list[int], status: str) -> None:
+        await self.run(self.queries.set_outbox_status, broadcast_id, chat_ids, status)
+
+    async def prune_broadcasts(self, before: datetime) -> int:
+        return await self.run(self.queries.prune_broadcasts, before)
+
+    async def expire_broadcast(self, broadcast_id: int) -> None:
+        await self.run(self.queries.expire_broadcast, broadcast_id)
+
+    def shutdown(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+if __name__ == "__main__":
+    exit()
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from threading import Lock
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Iterator
+
+from telebot.types import BotCommand, BotCommandScope, User
+
+from .json_file import JSON_File
+
+class Bootstrap:
+    def __init__(self, logger: logging.Logger, state_filename: str, workers: int = 4, me_ttl: float = 86400):
+        self.logger: logging.Logger = logger
+        self.me_ttl: float = me_ttl
+        self.__started: float = time.perf_counter()
+        self.__marked: float = self.__started
+        self.__timings: list[tuple[str, float]] = list()
+        self.__lock: Lock = Lock()
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bootstrap")
+        self.__tasks: list[tuple[str, Future[Any], bool]] = list()
+        self.state_filename: str = state_filename
+        self.__state: JSON_File|None = None
+        self.__state_lock: Lock = Lock()
+
+    def __open_state(self, create: bool) -> JSON_File|None:
+        with self.__state_lock:
+            if self.__state is None and create and not os.path.exists(self.state_filename):
+                with open(self.state_filename, 'w', encoding="UTF-8") as state_file:
+                    json.dump({}, state_file)
+            if self.__state is None and os.path.exists(self.state_filename):
+                self.__state = JSON_File(self.state_filename)
+            return self.__state
+
+    def get_state(self, key: str) -> Any:
+        state: JSON_File|None = self.__open_state(create=False)
+        return state.get(key) if state is not None else None
+
+    def set_state(self, values: dict[str, Any]) -> None:
+        state: JSON_File|None = self.__open_state(create=True)
+        assert state is not None
+        state.set(values)
+
+    def __record(self, name: str, seconds: float) -> None:
+        with self.__lock:
+            self.__timings.append((name, seconds))
+
+    def mark(self, name: str) -> None:
+        now: float = time.perf_counter()
+        self.__record(name, now - self.__marked)
+        self.__marked = now
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        started: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.__record(name, time.perf_counter() - started)
+
+    def background(self, name: str, function: Callable[..., Any], *args: Any, required: bool = True) -> Future[Any]:
+        def timed() -> Any:
+            with self.step(name):
+                return function(*args)
+        future: Future[Any] = self.__executor.submit(timed)
+        self.__tasks.append((name, future, required))
+        return future
+
+    async def run_async(self, name: str, awaitable: Awaitable[Any], required: bool = True) -> Any:
+        try:
+            with self.step(name):
+                return await awaitable
+        except Exception as exception:
+            if required:
+                raise
+            self.logger.warning(f"Крок запуску \"{name}\" завершився помилкою: \"{exception}\"")
+
+    def wait(self) -> None:
+        tasks, self.__tasks = self.__tasks, list()
+        for name, future, required in tasks:
+            try:
+                future.result()
+            except Exception as exception:
+                if required:
+                    raise
+                self.logger.warning(f"Крок запуску \"{name}\" завершився помилкою: \"{exception}\"")
+
+    def report(self) -> None:
+        total: float = time.perf_counter() - self.__started
+        with self.__lock:
+            timings: str = ", ".join(f"{name} {seconds * 1000:.0f} мс" for name, seconds in self.__timings)
+        self.logger.info(f"Бот запущено за {total * 1000:.0f} мс ({timings}).")
+
+    @staticmethod
+    def bot_id(token: str) -> str:
+        return token.split(':', 1)[0]
+
+    @staticmethod
+    def commands_digest(bot_id: str, commands: list[tuple[list[BotCommand], BotCommandScope]]) -> str:
+        payload: list[Any] = [bot_id] + [[[command.to_dict() for command in scope_commands], json.loads(scope.to_json())] for scope_commands, scope in commands]
+        return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("UTF-8")).hexdigest()
+
+    def commands_changed(self, bot_id: str, commands: list[tuple[list[BotCommand], BotCommandScope]]) -> str|None:
+        digest: str = self.commands_digest(bot_id, commands)
+        if self.get_state("commands_digest") == digest:
+            self.logger.info("Команди бота не змінились, повторна реєстрація пропущена.")
+            return None
+        return digest
+
+    def remember_commands(self, digest: str) -> None:
+        self.set_state({"commands_digest": digest})
+
+    def set_commands(self, bot: Any, commands: list[tuple[list[BotCommand], BotCommandScope]]) -> bool:
+        digest: str|None = self.commands_changed(self.bot_id(bot.token), commands)
+        if digest is None:
+            return False
+        for scope_commands, scope in commands:
+            bot.set_my_commands(scope_commands, scope)
+        self.remember_commands(digest)
+        return True
+
+    def cached_me(self, bot_id: str) -> User|None:
+        cached: Any = self.get_state("me")
+        if not isinstance(cached, dict) or str(cached.get("user", {}).get("id")) != bot_id:
+            return None
+        if time.time() - cached.get("saved_at", 0) > self.me_ttl:
+            return None
+        return User.de_json(cached["user"])
+
+    def remember_me(self, me: User) -> User:
+        self.set_state({"me": {"user": me.to_dict(), "saved_at": time.time()}})
+        return me
+
+    def get_me(self, bot: Any) -> User:
+        me: User|None = self.cached_me(self.bot_id(bot.token))
+        return me if me is not None else self.remember_me(bot.get_me())
+
+    def shutdown(self) -> None:
+        self.__executor.shutdown(wait=False)
+
+if __name__ == "__main__":
+    exit()
@@ -0,0 +1,142 @@
+import time
+import logging
+from threading import Lock
+from typing import Any, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from telebot.apihelper import ApiException
+
+from .dict_types import BroadcastDicts
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self.__tokens: float = capacity
+        self.__updated: float = time.monotonic()
+        self.__blocked_until: float = 0
+        self.__lock: Lock = Lock()
+
+    def __refill(self, now: float) -> None:
+        self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+    def reserve(self) -> float:
+        with self.__lock:
+            now: float = time.monotonic()
+            self.__refill(now)
+            if now >= self.__blocked_until and self.__tokens >= 1:
+                self.__tokens -= 1
+                return 0
+            return max(self.__blocked_until - now, (1 - self.__tokens) / self.rate)
+
+    def acquire(self) -> None:
+        while (delay := self.reserve()) > 0:
+            time.sleep(delay)
+
+    def block(self, seconds: float) -> None:
+        with self.__lock:
+            self.__blocked_until = max(self.__blocked_until, time.monotonic() + seconds)
+            self.__tokens = 0
+
+    def is_full(self) -> bool:
+        with self.__lock:
+            self.__refill(time.monotonic())
+            return self.__tokens >= self.capacity
+
+
+class _RateLimiter:
+    def __init__(self, logger: logging.Logger, rate: float, group_rate: float, max_retries: int):
+        self.logger: logging.Logger = logger
+        self.max_retries: int = max_retries
+        self.group_rate: float = group_rate
+        self.bucket: TokenBucket = TokenBucket(rate, rate)
+        self.__group_buckets: dict[int, TokenBucket] = dict()
+        self.__group_buckets_lock: Lock = Lock()
+
+    def _get_group_bucket(self, chat_id: int) -> TokenBucket|None:
+        if chat_id >= 0:
+            return None
+        with self.__group_buckets_lock:
+            bucket: TokenBucket|None = self.__group_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self.__group_buckets[chat_id] = TokenBucket(self.group_rate, 20)
+            return bucket
+
+    def _prune_group_buckets(self) -> None:
+        with self.__group_buckets_lock:
+            for chat_id in [chat_id for chat_id, bucket in self.__group_buckets.items() if bucket.is_full()]:
+                del self.__group_buckets[chat_id]
+
+    @staticmethod
+    def is_unreachable(error: Exception) -> bool:
+        error_code: int|None = getattr(error, "error_code", None)
+        return error_code == 403 or (error_code == 400 and "chat not found" in str(getattr(error, "description", "")).lower())
+
+    def _handle_error(self, chat_id: int, error: Exception, attempt: int) -> bool|None:
+        if getattr(error, "error_code", None) == 429 and attempt < self.max_retries:
+            retry_after: float = float(getattr(error, "result_json", {}).get("parameters", {}).get("retry_after", 1))
+            self.logger.warning(f"Telegram обмежив розсилку, повтор через {retry_after} с. ID = {chat_id}")
+            self.bucket.block(retry_after)
+            return True
+        if self.is_unreachable(error):
+            return None
+        self.logger.warning(f"Не вдалося відправити повідомлення в чат {chat_id}: \"{getattr(error, 'description', error)}\"")
+        return False
+
+    def _give_up(self, chat_id: int, retry: bool|None, index: int) -> bool|None:
+        if index > 0:
+            self.logger.warning(f"Основне повідомлення доставлено, але супутнє не вдалося відправити. ID = {chat_id}")
+            return True
+        return retry
+
+    def _collect(self, result: BroadcastDicts.ResultDict, chat_id: int, delivered: bool|None) -> None:
+        if delivered is None:
+            result["unreachable"].append(chat_id)
+        elif delivered:
+            result["sent"].append(chat_id)
+        else:
+            result["failed"].append(chat_id)
+
+
+class Broadcaster(_RateLimiter):
+    def __init__(self, logger: logging.Logger, workers: int = 8, rate: float = 30, group_rate: float = 20 / 60, max_retries: int = 3):
+        super().__init__(logger, rate, group_rate, max_retries)
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="broadcast")
+
+    def __send(self, chat_id: int, messages: list[Callable[[int], Any]]) -> bool|None:
+        group_bucket: TokenBucket|None = self._get_group_bucket(chat_id)
+        for index, message in enumerate(messages):
+            for attempt in range(self.max_retries + 1):
+                self.bucket.acquire()
+                if group_bucket is not None:
+                    group_bucket.acquire()
+                try:
+                    message(chat_id)
+                    break
+                except ApiException as error:
+                    retry: bool|None = self._handle_error(chat_id, error, attempt)
+                    if not retry:
+                        return self._give_up(chat_id, retry, index)
+        return True
+
+    def broadcast(self, chat_ids: Iterable[int], messages: list[Callable[[int], Any]]) -> BroadcastDicts.ResultDict:
+        started: float = time.monotonic()
+        result: BroadcastDicts.ResultDict = {"sent": [], "failed": [], "unreachable": [], "duration": 0}
+        futures = [(chat_id, self.__executor.submit(self.__send, chat_id, messages)) for chat_id in chat_ids]
+        for chat_id, future in futures:
+            try:
+                delivered: bool|None = future.result()
+            except Exception as exception:
+                self.logger.error(f"Помилка під час розсилки в чат {chat_id}: \"{exception}\"")
+                delivered = False
+            self._collect(result, chat_id, delivered)
+        self._prune_group_buckets()
+        result["duration"] = time.monotonic() - started
+        return result
+
+    def shutdown(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+if __name__ == "__main__":
+    exit()
@@ -0,0 +1,96 @@
+import json
+import time
+import logging
+from threading import Lock
+from collections import OrderedDict
+from typing import Protocol
+
+from .dict_types import ConversationDicts, TableDicts
+
+class ConversationBackend(Protocol):
+    def get_conversations(self, now: float) -> list[TableDicts.ConversationDict]: ...
+
+    def set_conversation(self, chat_id: int, user_id: int, state: str, expires_at: float) -> None: ...
+
+    def delete_conversation(self, chat_id: int, user_id: int) -> None: ...
+
+
+class ConversationStore:
+    def __init__(self, logger: logging.Logger, backend: ConversationBackend|None = None, ttl: float = 900, max_size: int = 10000):
+        self.logger: logging.Logger = logger
+        self.backend: ConversationBackend|None = backend
+        self.ttl: float = ttl
+        self.max_size: int = max_size
+        self.__entries: OrderedDict[tuple[int, int], tuple[float, ConversationDicts.StateDict]] = OrderedDict()
+        self.__lock: Lock = Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__entries)
+
+    def load(self) -> int:
+        if self.backend is None:
+            return 0
+        rows: list[TableDicts.ConversationDict] = self.backend.get_conversations(time.time())
+        with self.__lock:
+            for row in rows:
+                self.__entries[(row["chat_id"], row["user_id"])] = (row["expires_at"], json.loads(row["state"]))
+        for key in self.__evict():
+            self.backend.delete_conversation(*key)
+        self.logger.info(f"Відновлено незавершених діалогів: {len(self)}.")
+        return len(rows)
+
+    def __evict(self) -> list[tuple[int, int]]:
+        now: float = time.time()
+        evicted: list[tuple[int, int]] = list()
+        with self.__lock:
+            while self.__entries:
+                key, (expires_at, _) = next(iter(self.__entries.items()))
+                if len(self.__entries) <= self.max_size and expires_at > now:
+                    break
+                del self.__entries[key]
+                evicted.append(key)
+        return evicted
+
+    def get(self, chat_id: int, user_id: int) -> ConversationDicts.StateDict|None:
+        key: tuple[int, int] = (chat_id, user_id)
+        with self.__lock:
+            entry: tuple[float, ConversationDicts.StateDict]|None = self.__entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self.hits += 1
+                self.__entries.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+            if entry is None:
+                return None
+            del self.__entries[key]
+        if self.backend is not None:
+            self.backend.delete_conversation(chat_id, user_id)
+        return None
+
+    def set(self, chat_id: int, user_id: int, state: ConversationDicts.StateDict) -> None:
+        expires_at: float = time.time() + self.ttl
+        with self.__lock:
+            self.__entries[(chat_id, user_id)] = (expires_at, state)
+            self.__entries.move_to_end((chat_id, user_id))
+        if self.backend is not None:
+            self.backend.set_conversation(chat_id, user_id, json.dumps(state, ensure_ascii=False), expires_at)
+            for key in self.__evict():
+                self.backend.delete_conversation(*key)
+        else:
+            self.__evict()
+
+    def pop(self, chat_id: int, user_id: int) -> ConversationDicts.StateDict|None:
+        state: ConversationDicts.StateDict|None = self.get(chat_id, user_id)
+        if state is None:
+            return None
+        with self.__lock:
+            self.__entries.pop((chat_id, user_id), None)
+        if self.backend is not None:
+            self.backend.delete_conversation(chat_id, user_id)
+        return state
+
+if __name__ == "__main__":
+    exit()
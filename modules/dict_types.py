@@ -1,6 +1,8 @@
+from keyword import iskeyword
 from types import NoneType
 from typing import TypedDict
 from datetime import datetime
+from dataclasses import dataclass
 
 class MySQLConnectionDict(TypedDict):
     user: str
@@ -9,27 +11,36 @@ class MySQLConnectionDict(TypedDict):
     database: str
     autocommit: bool
 
-class TableDicts:
-    class RingDict(TypedDict):
+def field_name(column: str) -> str:
+    return f"{column}_" if iskeyword(column) else column
+
+def column_name(field: str) -> str:
+    return field[:-1] if field.endswith("_") and iskeyword(field[:-1]) else field
+
+class TableRows:
+    @dataclass(frozen=True, slots=True)
+    class Ring:
         id: int
         name: str
         start: datetime
         end: datetime
 
-    class StickerDict(TypedDict):
-        id: str
-        type: str
-
-    class WeekdayDict(TypedDict):
+    @dataclass(frozen=True, slots=True)
+    class Weekday:
         id: int
         name: str
         is_work_day: bool
 
-    class UserDict(TypedDict):
+    @dataclass(frozen=True, slots=True)
+    class Lesson:
         id: int
-        is_subscriber: bool
+        name: str
+        link: str|None
+        class_: str|None
+        max_grade: int|None
 
-    class TimetableDict(TypedDict):
+    @dataclass(frozen=True, slots=True)
+    class Timetable:
         id: int
         weekday_id: int
         ring_id: int
@@ -38,7 +49,42 @@ class TableDicts:
         replacement_id: int|None
         remind: str|None
 
-    LessonDict = TypedDict("LessonDict", {"id": int, "name": str, "link": str|None, "class": str|None, "max_grade": int|None})
+    @dataclass(frozen=True, slots=True)
+    class Day:
+        weekday_id: int
+        ring_id: int
+        remind: str|None
+        lesson: "TableRows.Lesson|None"
+        flasher: "TableRows.Lesson|None"
+        replacement: "TableRows.Lesson|None"
+
+class TableDicts:
+    class StickerDict(TypedDict):
+        id: str
+        type: str
+
+    class UserDict(TypedDict):
+        id: int
+        is_subscriber: bool
+
+    class BroadcastDict(TypedDict):
+        id: int
+        key: str
+        text: str
+        sticker_id: str|None
+        expires_at: datetime|None
+        created_at: datetime
+
+    class OutboxDict(TypedDict):
+        broadcast_id: int
+        chat_id: int
+        status: str
+
+    class ConversationDict(TypedDict):
+        chat_id: int
+        user_id: int
+        state: str
+        expires_at: float
 
 class TimetableDicts:
     class LessonDict(TypedDict):
@@ -47,6 +93,41 @@ class TimetableDicts:
         remind: str|None
         lesson_id: int
 
+    class DayDict(TypedDict):
+        lessons: "list[TimetableDicts.LessonDict|None]"
+        next_lesson: list[int|None]
+        last_lesson: int|None
+
     class FoundLessonDict(TypedDict):
         lesson: "TimetableDicts.LessonDict|NoneType"
-        ring: TableDicts.RingDict
+        ring: TableRows.Ring
+
+
+class BroadcastDicts:
+    class ResultDict(TypedDict):
+        sent: list[int]
+        failed: list[int]
+        unreachable: list[int]
+        duration: float
+
+
+class SchedulerDicts:
+    class EventDict(TypedDict):
+        kind: str
+        key: str
+        at: datetime
+        weekday_id: int
+        ring_id: int|None
+        text: str|None
+        sticker_type: list[str]
+        expires_at: datetime|None
+
+
+class ConversationDicts:
+    class StateDict(TypedDict):
+        step: str
+        column_name: str|None
+        weekday_id: int|None
+        ring_id: int|None
+        lesson_id: int|None
+        message_id: int|None
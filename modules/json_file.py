@@ -1,25 +1,60 @@
 import os
 import json
+import time
+import tempfile
+from copy import deepcopy
+from threading import Lock
 from typing import Any
 
 class JSON_File:
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, check_interval: float = 1.0):
         self.__filename = filename
         if not os.path.exists(filename):
             raise FileNotFoundError
+        self.check_interval: float = check_interval
+        self.__data: dict[str, Any] = dict()
+        self.__signature: tuple[int, int]|None = None
+        self.__checked: float|None = None
+        self.__lock: Lock = Lock()
+
+    def __load(self) -> dict[str, Any]:
+        now: float = time.monotonic()
+        if self.__checked is not None and now - self.__checked < self.check_interval:
+            return self.__data
+        stat: os.stat_result = os.stat(self.__filename)
+        if (stat.st_mtime_ns, stat.st_size) != self.__signature:
+            with open(self.__filename, 'r', encoding="UTF-8") as json_file:
+                json_data = json.load(json_file)
+            assert isinstance(json_data, dict)
+            self.__data = json_data
+            self.__signature = (stat.st_mtime_ns, stat.st_size)
+        self.__checked = now
+        return self.__data
 
     def get(self, key: str) -> Any:
-        with open(self.__filename, 'r', encoding="UTF-8") as json_file:
-            return json.load(json_file).get(key)
+        with self.__lock:
+            return deepcopy(self.__load().get(key))
 
     def set(self, values: dict[str, Any]) -> None:
-        with open(self.__filename, 'r+', encoding="UTF-8") as json_file:
-            json_data = json.load(json_file)
-            assert isinstance(json_data, dict)
-            json_data.update(values)
-            json_file.seek(0)
-            json.dump(json_data, json_file, indent=2, ensure_ascii=False, allow_nan=False)
-            json_file.truncate()
+        with self.__lock:
+            self.__checked = None
+            json_data: dict[str, Any] = {**self.__load(), **values}
+            directory: str = os.path.dirname(os.path.abspath(self.__filename))
+            file_descriptor, temp_filename = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+            try:
+                with os.fdopen(file_descriptor, 'w', encoding="UTF-8") as json_file:
+                    json.dump(json_data, json_file, indent=2, ensure_ascii=False, allow_nan=False)
+                    json_file.flush()
+                    os.fsync(json_file.fileno())
+                os.chmod(temp_filename, os.stat(self.__filename).st_mode)
+                os.replace(temp_filename, self.__filename)
+            except BaseException:
+                os.unlink(temp_filename)
+                raise
+            stat: os.stat_result = os.stat(self.__filename)
+            self.__data = json_data
+            self.__signature = (stat.st_mtime_ns, stat.st_size)
+            self.__checked = time.monotonic()
 
 if __name__ == "__main__":
     exit()
@@ -0,0 +1,215 @@
+import time
+import inspect
+import logging
+from bisect import bisect_left
+from threading import Lock, Thread
+from functools import wraps
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator
+
+_Labels = tuple[tuple[str, str], ...]
+_Sample = tuple[str, dict[str, str], float]
+
+class _Histogram:
+    def __init__(self, buckets: list[float]):
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0
+        self.count: int = 0
+
+
+class Metrics:
+    buckets: list[float] = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+    def __init__(self, logger: logging.Logger, prefix: str = "timetable_bot", enabled: bool = True):
+        self.logger: logging.Logger = logger
+        self.prefix: str = prefix
+        self.enabled: bool = enabled
+        self.__counters: dict[tuple[str, _Labels], float] = dict()
+        self.__histograms: dict[tuple[str, _Labels], _Histogram] = dict()
+        self.__collectors: list[Callable[[], list[_Sample]]] = list()
+        self.__lock: Lock = Lock()
+        self.__server: ThreadingHTTPServer|None = None
+
+    @staticmethod
+    def __labels(labels: dict[str, str]) -> _Labels:
+        return tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key: tuple[str, _Labels] = (name, self.__labels(labels))
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key: tuple[str, _Labels] = (name, self.__labels(labels))
+        with self.__lock:
+            histogram: _Histogram|None = self.__histograms.get(key)
+            if histogram is None:
+                histogram = self.__histograms[key] = _Histogram(self.buckets)
+            histogram.counts[bisect_left(self.buckets, seconds)] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        started: float = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - started, **labels)
+
+    def wrap(self, name: str, function: Callable[..., Any], **labels: str) -> Callable[..., Any]:
+        if not self.enabled:
+            return function
+        if inspect.iscoroutinefunction(function):
+            @wraps(function)
+            async def async_wrap(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return await function(*args, **kwargs)
+            return async_wrap
+
+        @wraps(function)
+        def wrap(*args, **kwargs):
+            with self.timer(name, **labels):
+                return function(*args, **kwargs)
+        return wrap
+
+    def wrap_request(self, name: str, send: Callable[..., Any]) -> Callable[..., Any]:
+        if not self.enabled:
+            return send
+
+        @wraps(send)
+        def wrap(method: str, url: str, **kwargs):
+            with self.timer(name, method=url.rsplit('/', 1)[-1]):
+                return send(method, url, **kwargs)
+        return wrap
+
+    def instrument(self, target: object, name: str, label: str) -> None:
+        if not self.enabled:
+            return
+        for attribute in dir(type(target)):
+            if attribute.startswith('_'):
+                continue
+            method: Any = getattr(target, attribute)
+            if inspect.ismethod(method):
+                setattr(target, attribute, self.wrap(name, method, **{label: attribute}))
+
+    def instrument_handlers(self, bot: Any) -> None:
+        if not self.enabled:
+            return
+        for attribute, handlers in vars(bot).items():
+            if not attribute.endswith("_handlers") or not isinstance(handlers, list):
+                continue
+            for handler in handlers:
+                if isinstance(handler, dict) and callable(handler.get("function")):
+                    handler["function"] = self.wrap("handler", handler["function"], handler=handler["function"].__name__)
+
+    def add_collector(self, collector: Callable[[], list[_Sample]]) -> None:
+        with self.__lock:
+            self.__collectors.append(collector)
+
+    def add_cache(self, name: str, cache: Any) -> None:
+        def collect() -> list[_Sample]:
+            hits, misses = cache.hits, cache.misses
+            return [
+                ("cache_hits_total", {"cache": name}, hits),
+                ("cache_misses_total", {"cache": name}, misses),
+                ("cache_hit_ratio", {"cache": name}, hits / (hits + misses) if hits + misses > 0 else 0),
+            ]
+        self.add_collector(collect)
+
+    @staticmethod
+    def __escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def __format_labels(self, labels: _Labels, **extra: str) -> str:
+        pairs: list[tuple[str, str]] = list(labels) + list(extra.items())
+        if len(pairs) < 1:
+            return ""
+        return "{" + ",".join(f"{key}=\"{self.__escape(value)}\"" for key, value in pairs) + "}"
+
+    @staticmethod
+    def __format_value(value: float) -> str:
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+    def render(self) -> str:
+        with self.__lock:
+            counters: list[tuple[tuple[str, _Labels], float]] = sorted(self.__counters.items())
+            histograms: list[tuple[str, _Labels, list[int], float, int]] = sorted(
+                (name, labels, list(histogram.counts), histogram.sum, histogram.count) for (name, labels), histogram in self.__histograms.items()
+            )
+            collectors: list[Callable[[], list[_Sample]]] = list(self.__collectors)
+
+        lines: list[str] = list()
+        declared: set[str] = set()
+        def declare(name: str, metric_type: str) -> None:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), value in counters:
+            declare(f"{self.prefix}_{name}", "counter")
+            lines.append(f"{self.prefix}_{name}{self.__format_labels(labels)} {self.__format_value(value)}")
+        for name, labels, counts, total, count in histograms:
+            full_name: str = f"{self.prefix}_{name}"
+            declare(full_name, "histogram")
+            cumulative: int = 0
+            for bucket, bucket_count in zip([*map(str, self.buckets), "+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{full_name}_bucket{self.__format_labels(labels, le=bucket)} {cumulative}")
+            lines.append(f"{full_name}_sum{self.__format_labels(labels)} {total!r}")
+            lines.append(f"{full_name}_count{self.__format_labels(labels)} {count}")
+        collected: dict[str, list[tuple[dict[str, str], float]]] = dict()
+        for collector in collectors:
+            try:
+                samples: list[_Sample] = collector()
+            except Exception as exception:
+                self.logger.warning(f"Не вдалося зібрати метрики: \"{exception}\"")
+                continue
+            for name, labels, value in samples:
+                collected.setdefault(name, list()).append((labels, value))
+        for name, samples_by_name in collected.items():
+            declare(f"{self.prefix}_{name}", "counter" if name.endswith("_total") else "gauge")
+            for labels, value in samples_by_name:
+                lines.append(f"{self.prefix}_{name}{self.__format_labels(self.__labels(labels))} {self.__format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, host: str, port: int) -> None:
+        metrics: Metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split('?', 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body: bytes = metrics.render().encode("UTF-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return
+
+        self.__server = ThreadingHTTPServer((host, port), Handler)
+        Thread(target=self.__server.serve_forever, name="metrics", daemon=True).start()
+        self.logger.info(f"Метрики доступні на http://{host}:{port}/metrics")
+
+    def shutdown(self) -> None:
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server = None
+
+if __name__ == "__main__":
+    exit()
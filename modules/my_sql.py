@@ -1,44 +1,61 @@
 import logging
 import mysql.connector
-from typing import cast
+from typing import Iterator, cast
+from threading import BoundedSemaphore, Lock
+from contextlib import contextmanager
 
 import mysql.connector.cursor
+import mysql.connector.pooling
 
+from .storage import StorageBackend
 from .dict_types import MySQLConnectionDict
 
-class MySQL:
-    def __init__(self, connection_dict: MySQLConnectionDict, logger: logging.Logger, autocommit: bool = False):
+class MySQL(StorageBackend):
+    def __init__(self, connection_dict: MySQLConnectionDict, logger: logging.Logger, autocommit: bool = False, pool_size: int = 5, lazy: bool = False):
         self.connection_dict: MySQLConnectionDict = connection_dict
         self.logger: logging.Logger = logger
-        self.__connection: mysql.connector.MySQLConnection|None = None
-        self.__cursor: mysql.connector.cursor.MySQLCursorDict|None = None
-        self.connect()
+        self.pool_size: int = pool_size
+        self.__pool: mysql.connector.pooling.MySQLConnectionPool|None = None
+        self.__semaphore: BoundedSemaphore = BoundedSemaphore(pool_size)
+        self.__connect_lock: Lock = Lock()
+        if not lazy:
+            self.connect()
 
     def connect(self) -> None:
         try:
-            self.__connection = cast(mysql.connector.MySQLConnection, mysql.connector.connect(**self.connection_dict))
+            self.__pool = mysql.connector.pooling.MySQLConnectionPool(pool_name="timetable_bot", pool_size=self.pool_size, **self.connection_dict)
         except mysql.connector.Error as error:
             self.logger.error(f"Database connection error: \"{error.msg}\"")
             raise
 
-    def cursor(self) -> mysql.connector.cursor.MySQLCursorDict:
-        if self.__connection is None or not self.__connection.is_connected():
-            self.connect()
-            self.__cursor = None
-        assert self.__connection is not None
-        if self.__cursor is None:
-            self.__cursor = cast(mysql.connector.cursor.MySQLCursorDict, self.__connection.cursor(dictionary=True))
-        return self.__cursor
+    @contextmanager
+    def cursor(self) -> Iterator[mysql.connector.cursor.MySQLCursorDict]:
+        if self.__pool is None:
+            with self.__connect_lock:
+                if self.__pool is None:
+                    self.connect()
+        assert self.__pool is not None
+        with self.__semaphore:
+            try:
+                connection = self.__pool.get_connection()
+            except mysql.connector.Error as error:
+                self.logger.error(f"Database connection error: \"{error.msg}\"")
+                raise
+            try:
+                cursor = cast(mysql.connector.cursor.MySQLCursorDict, connection.cursor(dictionary=True, buffered=True))
+                try:
+                    yield cursor
+                finally:
+                    cursor.close()
+            finally:
+                connection.close()
 
     def close(self) -> bool:
-        if self.__connection is not None and self.__connection.is_connected():
-            if self.__cursor is not None:
-                self.__cursor.close()
-                self.__cursor = None
-            self.__connection.close()
-            self.__connection = None
+        if self.__pool is not None:
+            self.__pool._remove_connections()
+            self.__pool = None
             return True
         return False
 
 if __name__ == "__main__":
-    exit()
\ No newline at end of file
+    exit()
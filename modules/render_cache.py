@@ -0,0 +1,40 @@
+from threading import Lock
+from typing import Callable, Hashable
+
+class RenderCache:
+    def __init__(self):
+        self.__entries: dict[tuple[Hashable, ...], str] = dict()
+        self.__version: int|None = None
+        self.__week_parity: int|None = None
+        self.__lock: Lock = Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: tuple[Hashable, ...], version: int, week_parity: int|None, render: Callable[[], str]) -> str:
+        with self.__lock:
+            if self.__version != version:
+                self.__entries = dict()
+                self.__version = version
+            rendered: str|None = self.__entries.get((*key, week_parity))
+            if rendered is not None:
+                self.hits += 1
+                return rendered
+            self.misses += 1
+        rendered = render()
+        with self.__lock:
+            if self.__version == version:
+                self.__entries[(*key, week_parity)] = rendered
+        return rendered
+
+    def set_week_parity(self, week_parity: int) -> None:
+        with self.__lock:
+            if self.__week_parity is not None and self.__week_parity != week_parity:
+                self.__entries = {key: value for key, value in self.__entries.items() if key[-1] in (None, week_parity)}
+            self.__week_parity = week_parity
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries = dict()
+
+if __name__ == "__main__":
+    exit()
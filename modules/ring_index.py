@@ -0,0 +1,42 @@
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+
+from .dict_types import TableRows
+
+class RingIndex:
+    lesson_lead: int = 5 * 60
+    notice_lead: int = 3 * 60
+
+    def __init__(self, version: int, rings: list[TableRows.Ring]):
+        self.version: int = version
+        self.rings: list[TableRows.Ring] = list(rings)
+        self.starts: list[float] = [self.offset(ring.start) for ring in rings]
+        self.ends: list[float] = [self.offset(ring.end) for ring in rings]
+        self.lesson_starts: list[float] = [start - self.lesson_lead for start in self.starts]
+        self.notices: list[float] = [start - self.notice_lead for start in self.starts]
+
+    def __len__(self) -> int:
+        return len(self.rings)
+
+    @staticmethod
+    def offset(moment: datetime|time) -> float:
+        return moment.hour * 3600 + moment.minute * 60 + moment.second + moment.microsecond / 1_000_000
+
+    @staticmethod
+    def at(target_date: date, offset: float) -> datetime:
+        return datetime.combine(target_date, time.min) + timedelta(seconds=offset)
+
+    def is_early(self, offset: float) -> bool:
+        return len(self.rings) < 1 or offset < self.lesson_starts[0]
+
+    def is_over(self, offset: float) -> bool:
+        return len(self.rings) < 1 or self.ends[-1] < offset
+
+    def find(self, offset: float) -> int|None:
+        ring_index: int = bisect_right(self.ends, offset)
+        if ring_index < len(self.ends) and self.lesson_starts[ring_index] < offset:
+            return ring_index
+        return None
+
+if __name__ == "__main__":
+    exit()
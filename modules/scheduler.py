@@ -0,0 +1,207 @@
+import heapq
+import asyncio
+from logging import Logger
+from threading import Event
+from typing import Any, Callable, ContextManager
+from contextlib import nullcontext
+from datetime import date, datetime, time, timedelta
+
+from .metrics import Metrics
+from .sql_trace import SQLTracer
+from .sql_queries import Queries
+from .timetable import Timetable
+from .ring_index import RingIndex
+from .dict_types import SchedulerDicts, TableRows, TimetableDicts
+
+class DayScheduler:
+    distribution_kinds: list[str] = ["lesson", "next_lesson", "day_finished"]
+    retry_interval: float = 30
+
+    def __init__(self, queries: Queries, timetable: Timetable, get_datetime: Callable[[], datetime],
+                 distribute: Callable[[str, list[str], str, datetime|None], Any], logger: Logger,
+                 metrics: Metrics|None = None, tracer: SQLTracer|None = None):
+        self.queries = queries
+        self.timetable = timetable
+        self.get_datetime = get_datetime
+        self.distribute = distribute
+        self.logger = logger
+        self.metrics: Metrics = metrics or Metrics(logger, enabled=False)
+        self.tracer: SQLTracer|None = tracer
+        self.__events: list[tuple[datetime, int, SchedulerDicts.EventDict]] = list()
+        self.__done: set[str] = set()
+        self.__date: date|None = None
+        self.__stale: bool = True
+        self.__plans: dict[date, tuple[int, list[SchedulerDicts.EventDict]]] = dict()
+        self.__changed: Event = Event()
+        self.queries.add_change_listener(lambda _: self.__changed.set())
+
+    def __now(self) -> datetime:
+        return self.get_datetime().replace(tzinfo=None)
+
+    def __event(self, kind: str, key: str, at: datetime, weekday_id: int, ring_id: int|None = None, text: str|None = None,
+                sticker_type: list[str]|None = None, expires_at: datetime|None = None) -> SchedulerDicts.EventDict:
+        return {
+            "kind": kind, "key": key, "at": at, "weekday_id": weekday_id, "ring_id": ring_id,
+            "text": text, "sticker_type": sticker_type or [], "expires_at": expires_at
+        }
+
+    def plan(self, target_date: date) -> list[SchedulerDicts.EventDict]:
+        weekday: TableRows.Weekday = self.queries.get_weekdays()[target_date.weekday()]
+        ring_index: RingIndex = self.timetable.get_ring_index()
+        rings: list[TableRows.Ring] = ring_index.rings
+        events: list[SchedulerDicts.EventDict] = list()
+        if not weekday.is_work_day or len(rings) < 1:
+            events.append(self.__event("day_cleanup", f"{target_date} cleanup", datetime.combine(target_date, time.min), weekday.id))
+            return events
+
+        day: TimetableDicts.DayDict = self.timetable.get_day(weekday.id, target_date)
+        last_lesson: int = day["last_lesson"] if day["last_lesson"] is not None else -1
+        for position, ring in enumerate(rings[:last_lesson + 1]):
+            ring_end: datetime = ring_index.at(target_date, ring_index.ends[position])
+            lesson: TimetableDicts.LessonDict|None = day["lessons"][position]
+            if lesson is not None and lesson["lesson_id"] != 1:
+                events.append(self.__event(
+                    "lesson", f"{target_date} {ring.id} lesson", ring_index.at(target_date, ring_index.notices[position]), weekday.id, ring.id,
+                    f"{lesson['name']} {lesson['link']}" + (lesson["remind"] or ""), ["study", "sad"], ring_end
+                ))
+            events.append(self.__event("ring_cleanup", f"{target_date} {ring.id} cleanup", ring_end, weekday.id, ring.id))
+            next_lesson: int|None = day["next_lesson"][position + 1]
+            if next_lesson is not None:
+                next_lesson_dict: TimetableDicts.LessonDict|None = day["lessons"][next_lesson]
+                assert next_lesson_dict is not None
+                events.append(self.__event(
+                    "next_lesson", f"{target_date} {ring.id} next", ring_end, weekday.id, ring.id,
+                    f"Далі буде {next_lesson_dict['name']}\n<i>В {rings[next_lesson].start.strftime('%H:%M')}.</i>",
+                    ["study", "sad"], ring_index.at(target_date, ring_index.starts[next_lesson])
+                ))
+            else:
+                events.append(self.__event(
+                    "day_finished", f"{target_date} end", ring_end, weekday.id, ring.id,
+                    "На <b>сьогодні</b> зайняття <b>закінчились</b>!\nლ(╹◡╹ლ)", ["happy", "lovely"],
+                    datetime.combine(target_date, time.max)
+                ))
+        events.append(self.__event("day_cleanup", f"{target_date} cleanup", ring_index.at(target_date, ring_index.ends[-1]), weekday.id))
+        return events
+
+    def planned(self, target_date: date) -> list[SchedulerDicts.EventDict]:
+        version: int = self.queries.snapshot().version
+        cached: tuple[int, list[SchedulerDicts.EventDict]]|None = self.__plans.get(target_date)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        events: list[SchedulerDicts.EventDict] = self.plan(target_date)
+        self.__plans[target_date] = (version, events)
+        return events
+
+    def prerender(self, now: datetime) -> None:
+        today: date = now.date()
+        self.__plans = {planned_date: plan for planned_date, plan in self.__plans.items() if planned_date >= today}
+        self.timetable.get_timetable(today, True)
+        next_workday: TableRows.Weekday|None = self.timetable.get_next_workday(today.weekday())
+        if next_workday is None:
+            return
+        next_date: date = today + timedelta(days=(next_workday.id - today.isoweekday()) % 7 or 7)
+        self.planned(next_date)
+        self.timetable.get_timetable(next_date, True)
+        self.logger.info(f"Повідомлення на {next_date} підготовлено заздалегідь.")
+
+    def build(self, now: datetime) -> None:
+        if self.__date != now.date():
+            self.__done = set()
+            self.__date = now.date()
+        self.timetable.render_cache.set_week_parity(self.timetable.get_week_parity(now.date()))
+        self.__events = list()
+        for sequence, event in enumerate(self.planned(now.date())):
+            if event["key"] in self.__done:
+                continue
+            if event["expires_at"] is not None and event["expires_at"] <= now:
+                continue
+            heapq.heappush(self.__events, (event["at"], sequence, event))
+        self.logger.info(f"Розклад розсилки на {now.date()} побудовано: {len(self.__events)} подій.")
+
+    def __execute(self, event: SchedulerDicts.EventDict) -> None:
+        match event["kind"]:
+            case "lesson" | "next_lesson" | "day_finished":
+                assert event["text"] is not None
+                self.distribute(event["text"], event["sticker_type"], event["key"], event["expires_at"])
+            case "ring_cleanup":
+                assert event["ring_id"] is not None
+                self.queries.clean_replacement_and_remind(event["weekday_id"], event["ring_id"])
+            case "day_cleanup":
+                self.queries.reset_days(event["at"].date(), [event["weekday_id"]])
+                self.queries.prune_broadcasts(event["at"])
+
+    def __pop_due(self, now: datetime) -> list[SchedulerDicts.EventDict]:
+        if self.__stale or self.__date != now.date() or self.__changed.is_set():
+            self.__changed.clear()
+            self.__stale = True
+            self.build(now)
+            self.__stale = False
+            try:
+                self.prerender(now)
+            except Exception as exception:
+                self.logger.warning(f"Не вдалося підготувати повідомлення заздалегідь: \"{exception}\"")
+        due: list[SchedulerDicts.EventDict] = list()
+        while len(self.__events) > 0 and self.__events[0][0] <= now:
+            due.append(heapq.heappop(self.__events)[2])
+        return due
+
+    def __sleep_time(self, now: datetime) -> float:
+        next_event: datetime = self.__events[0][0] if len(self.__events) > 0 else datetime.combine(now.date() + timedelta(days=1), time.min)
+        self.logger.info(f"Розсилка була призупинена. Наступна подія буде: {next_event.isoformat(sep=' ', timespec='seconds')}")
+        return max(0, (next_event - self.__now()).total_seconds())
+
+    def __failed(self, event: SchedulerDicts.EventDict, exception: Exception) -> None:
+        self.logger.error(f"Помилка під час виконання події розсилки \"{event['key']}\": \"{exception}\"")
+
+    def __crashed(self, exception: Exception) -> float:
+        self.logger.error(f"Помилка в циклі розсилки, повтор через {self.retry_interval:.0f} с: \"{exception}\"")
+        return self.retry_interval
+
+    def __trace(self, event: SchedulerDicts.EventDict) -> ContextManager[None]:
+        return self.tracer.trace(f"tick {event['key']}") if self.tracer is not None else nullcontext()
+
+    def run(self) -> None:
+        while True:
+            try:
+                now: datetime = self.__now()
+                for event in self.__pop_due(now):
+                    try:
+                        with self.metrics.timer("distribution_event", kind=event["kind"]), self.__trace(event):
+                            self.__execute(event)
+                    except Exception as exception:
+                        self.__failed(event, exception)
+                    self.__done.add(event["key"])
+                timeout: float = self.__sleep_time(now)
+            except Exception as exception:
+                timeout = self.__crashed(exception)
+            self.__changed.wait(timeout)
+
+    async def run_async(self) -> None:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        changed: asyncio.Event = asyncio.Event()
+        self.queries.add_change_listener(lambda _: loop.call_soon_threadsafe(changed.set))
+        while True:
+            try:
+                now: datetime = await asyncio.to_thread(self.__now)
+                for event in await asyncio.to_thread(self.__pop_due, now):
+                    try:
+                        with self.metrics.timer("distribution_event", kind=event["kind"]), self.__trace(event):
+                            if event["kind"] in self.distribution_kinds:
+                                assert event["text"] is not None
+                                await self.distribute(event["text"], event["sticker_type"], event["key"], event["expires_at"])
+                            else:
+                                await asyncio.to_thread(self.__execute, event)
+                    except Exception as exception:
+                        self.__failed(event, exception)
+                    self.__done.add(event["key"])
+                timeout: float = await asyncio.to_thread(self.__sleep_time, now)
+            except Exception as exception:
+                timeout = self.__crashed(exception)
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            changed.clear()
+
+if __name__ == "__main__":
+    exit()
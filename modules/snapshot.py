@@ -0,0 +1,64 @@
+from dataclasses import replace
+
+from .dict_types import TableRows, field_name
+
+class TimetableSnapshot:
+    def __init__(self, version: int, rings: list[TableRows.Ring], weekdays: list[TableRows.Weekday],
+                 lessons: list[TableRows.Lesson], timetable: list[TableRows.Timetable], days: list[TableRows.Day]):
+        self.version: int = version
+        self.rings: list[TableRows.Ring] = rings
+        self.weekdays: list[TableRows.Weekday] = weekdays
+        self.lessons: dict[int, TableRows.Lesson] = {lesson.id: lesson for lesson in lessons}
+        self.timetable: dict[tuple[int, int], TableRows.Timetable] = {(row.weekday_id, row.ring_id): row for row in timetable}
+        self.days: dict[int, dict[int, TableRows.Day]] = {weekday.id: {} for weekday in weekdays}
+        for day_row in days:
+            self.days.setdefault(day_row.weekday_id, {})[day_row.ring_id] = day_row
+
+    def __join(self, row: TableRows.Timetable) -> TableRows.Day:
+        return TableRows.Day(
+            row.weekday_id,
+            row.ring_id,
+            row.remind,
+            self.lessons.get(row.lesson_id),
+            self.lessons.get(row.flasher_id) if row.flasher_id is not None else None,
+            self.lessons.get(row.replacement_id) if row.replacement_id is not None else None
+        )
+
+    def __rejoin(self, row: TableRows.Timetable) -> None:
+        self.days[row.weekday_id] = {**self.days.get(row.weekday_id, {}), row.ring_id: self.__join(row)}
+
+    def patch_timetable(self, version: int, weekday_id: int, ring_id: int, values: dict[str, str|int|None]) -> None:
+        row: TableRows.Timetable|None = self.timetable.get((weekday_id, ring_id))
+        if row is not None:
+            row = replace(row, **{field_name(column): value for column, value in values.items()})
+            self.timetable[(weekday_id, ring_id)] = row
+            self.__rejoin(row)
+        self.version = version
+
+    def clear_days(self, version: int, weekday_ids: list[int]) -> None:
+        for key, row in self.timetable.items():
+            if row.weekday_id in weekday_ids and (row.remind is not None or row.replacement_id is not None):
+                row = replace(row, remind=None, replacement_id=None)
+                self.timetable[key] = row
+                self.__rejoin(row)
+        self.version = version
+
+    def patch_lesson(self, version: int, lesson_id: int, values: dict[str, str|int|None]) -> None:
+        lesson: TableRows.Lesson|None = self.lessons.get(lesson_id)
+        if lesson is not None:
+            self.lessons[lesson_id] = replace(lesson, **{field_name(column): value for column, value in values.items()})
+            for row in self.timetable.values():
+                if lesson_id in (row.lesson_id, row.flasher_id, row.replacement_id):
+                    self.__rejoin(row)
+        self.version = version
+
+    def add_lesson(self, version: int, lesson: TableRows.Lesson) -> None:
+        self.lessons[lesson.id] = lesson
+        self.version = version
+
+    def patch_weekday(self, version: int, weekday_id: int, is_work_day: bool) -> None:
+        self.weekdays = [replace(weekday, is_work_day=is_work_day) if weekday.id == weekday_id else weekday for weekday in self.weekdays]
+        self.version = version
+
+if __name__ == "__main__":
+    exit()
@@ -1,94 +1,362 @@
-﻿import random
+﻿import time
+import random
 import logging
-from typing import Callable, cast
+from threading import Lock
+from datetime import date, datetime, timedelta
+from contextlib import contextmanager
+from dataclasses import fields
+from typing import Any, Callable, ContextManager, Iterator, TypeVar, cast
 
-from mysql.connector.cursor import MySQLCursorDict
+from .storage import Cursor
+from .dict_types import TableDicts, TableRows, column_name
+from .snapshot import TimetableSnapshot
 
-from .dict_types import TableDicts
+_Row = TypeVar("_Row")
 
 class Queries:
-    def __init__(self, cursor: Callable[[], MySQLCursorDict], logger: logging.Logger):
-        self._cursor: Callable[[], MySQLCursorDict] = cursor
+    def __init__(self, cursor: Callable[[], ContextManager[Cursor]], logger: logging.Logger, sticker_ttl: float = 3600):
+        self._cursor: Callable[[], ContextManager[Cursor]] = cursor
         self.logger = logger
+        self.sticker_ttl: float = sticker_ttl
+        self.__stickers: dict[str, list[str]]|None = None
+        self.__stickers_loaded: float = 0
+        self.__sticker_fallbacks: dict[tuple[str, ...], list[str]] = dict()
+        self.__stickers_lock: Lock = Lock()
+        self.__snapshot: TimetableSnapshot|None = None
+        self.__snapshot_lock: Lock = Lock()
+        self.__version: int = 0
+        self.__listeners: list[Callable[[int], None]] = list()
+
+    def snapshot(self) -> TimetableSnapshot:
+        with self.__snapshot_lock:
+            if self.__snapshot is None:
+                with self._cursor() as cursor:
+                    cursor.execute("SELECT * FROM `ring` ORDER BY id")
+                    rings: list[TableRows.Ring] = self.decode(TableRows.Ring, cursor.fetchall())
+                    cursor.execute("SELECT * FROM `weekday` ORDER BY id")
+                    weekdays: list[TableRows.Weekday] = self.decode(TableRows.Weekday, cursor.fetchall())
+                    cursor.execute("SELECT * FROM `lesson` ORDER BY id")
+                    lessons: list[TableRows.Lesson] = self.decode(TableRows.Lesson, cursor.fetchall())
+                    timetable, days = self.__select_week_timetable(cursor)
+                self.__snapshot = TimetableSnapshot(self.__version, rings, weekdays, lessons, timetable, days)
+                self.logger.info(f"Знімок розкладу завантажено з бази даних (версія {self.__version}).")
+            return self.__snapshot
+
+    @staticmethod
+    def columns(row_type: type) -> tuple[str, ...]:
+        return tuple(column_name(field.name) for field in fields(row_type))
+
+    @classmethod
+    def decode(cls, row_type: type[_Row], rows: list[dict[str, Any]], prefix: str = "") -> list[_Row]:
+        columns: tuple[str, ...] = cls.columns(row_type)
+        return [row_type(*[row[prefix + column] for column in columns]) for row in rows]
+
+    def __select_week_timetable(self, cursor: Cursor) -> tuple[list[TableRows.Timetable], list[TableRows.Day]]:
+        lesson_columns: tuple[str, ...] = self.columns(TableRows.Lesson)
+        cursor.execute(
+            "SELECT t.*, " +
+            ", ".join(f"{alias}.{column} AS {alias}_{column}" for alias in ["l", "f", "r"] for column in lesson_columns) +
+            " FROM `timetable` t"
+            " LEFT JOIN `lesson` l ON l.id = t.lesson_id"
+            " LEFT JOIN `lesson` f ON f.id = t.flasher_id"
+            " LEFT JOIN `lesson` r ON r.id = t.replacement_id"
+            " ORDER BY t.weekday_id, t.ring_id"
+        )
+        rows: list[dict[str, Any]] = cursor.fetchall()
+        timetable: list[TableRows.Timetable] = self.decode(TableRows.Timetable, rows)
+        lessons: dict[int, TableRows.Lesson] = dict()
+        def joined(row: dict[str, Any], alias: str) -> TableRows.Lesson|None:
+            lesson_id: int|None = row[f"{alias}_id"]
+            if lesson_id is None:
+                return None
+            if lesson_id not in lessons:
+                lessons[lesson_id] = self.decode(TableRows.Lesson, [row], f"{alias}_")[0]
+            return lessons[lesson_id]
+
+        days: list[TableRows.Day] = [
+            TableRows.Day(row["weekday_id"], row["ring_id"], row["remind"], joined(row, "l"), joined(row, "f"), joined(row, "r")) for row in rows
+        ]
+        return timetable, days
+
+    def add_change_listener(self, listener: Callable[[int], None]) -> None:
+        self.__listeners.append(listener)
+
+    def __notify_listeners(self, version: int) -> None:
+        for listener in self.__listeners:
+            listener(version)
+
+    def invalidate_snapshot(self) -> None:
+        with self.__snapshot_lock:
+            self.__version += 1
+            self.__snapshot = None
+            version: int = self.__version
+        self.__notify_listeners(version)
+
+    def __patch_snapshot(self, patch: Callable[[TimetableSnapshot, int], None]) -> None:
+        with self.__snapshot_lock:
+            self.__version += 1
+            if self.__snapshot is not None:
+                patch(self.__snapshot, self.__version)
+            version: int = self.__version
+        self.__notify_listeners(version)
 
     def is_new_user(self, user_id: int) -> bool:
-        cursor: MySQLCursorDict = self._cursor()
-        cursor.execute("SELECT 1 FROM `user` WHERE id = %s", [user_id])
-        if cursor.fetchone() is None:
-            cursor.execute("INSERT INTO `user` VALUES (%s, %s)", [user_id, False])
-            return True
-        return False
+        with self._cursor() as cursor:
+            cursor.execute("SELECT 1 FROM `user` WHERE id = %s", [user_id])
+            if cursor.fetchone() is None:
+                cursor.execute("INSERT INTO `user` VALUES (%s, %s)", [user_id, False])
+                return True
+            return False
 
     def set_subscription(self, user_id: int, is_subscriber: bool) -> None:
         if self.is_new_user(user_id):
             self.logger.info("Якись користувач не був зареєстрований але змінив підписку. (Зараз зареєстрован)")
-        self._cursor().execute("UPDATE `user` SET is_subscriber = %s WHERE id = %s", [is_subscriber, user_id])
+        with self._cursor() as cursor:
+            cursor.execute("UPDATE `user` SET is_subscriber = %s WHERE id = %s", [is_subscriber, user_id])
+
+    def set_subscriptions(self, user_ids: list[int], is_subscriber: bool, batch_size: int = 1000) -> None:
+        if len(user_ids) < 1:
+            return
+        with self._cursor() as cursor:
+            for batch_start in range(0, len(user_ids), batch_size):
+                batch: list[int] = user_ids[batch_start:batch_start + batch_size]
+                cursor.executemany("INSERT IGNORE INTO `user` VALUES (%s, %s)", [[user_id, is_subscriber] for user_id in batch])
+                cursor.execute(f"UPDATE `user` SET is_subscriber = %s WHERE id IN ({', '.join(['%s'] * len(batch))})", [is_subscriber, *batch])
+
+    def refresh_stickers(self) -> None:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT * FROM `sticker`")
+            stickers: list[TableDicts.StickerDict] = cast(list[TableDicts.StickerDict], cursor.fetchall())
+        sticker_index: dict[str, list[str]] = dict()
+        for sticker in stickers:
+            sticker_index.setdefault(sticker["type"], []).append(sticker["id"])
+        with self.__stickers_lock:
+            self.__stickers = sticker_index
+            self.__sticker_fallbacks = dict()
+            self.__stickers_loaded = time.monotonic()
 
     def get_sticker_id(self, sticker_type: list[str]|str) -> str:
-        selected_type: str = random.choice(sticker_type) if isinstance(sticker_type, list) else sticker_type
-        cursor: MySQLCursorDict = self._cursor()
-        cursor.execute("SELECT id FROM `sticker` WHERE type = %s", [selected_type])
-        selected_stickers: list[TableDicts.StickerDict] = cast(list[TableDicts.StickerDict], cursor.fetchall())
-        if len(selected_stickers) < 1:
-            self.logger.error(f"Жодного стикеру типу {selected_type} не було знайдена в базі даних!")
-            if isinstance(sticker_type, list) and len(sticker_type) > 1:
-                sticker_type.remove(selected_type)
-                return self.get_sticker_id(sticker_type)
+        if self.__stickers is None or time.monotonic() - self.__stickers_loaded > self.sticker_ttl:
+            self.refresh_stickers()
+        with self.__stickers_lock:
+            sticker_index: dict[str, list[str]] = cast(dict[str, list[str]], self.__stickers)
+            sticker_types: tuple[str, ...] = tuple(sticker_type) if isinstance(sticker_type, list) else (sticker_type,)
+            available_types: list[str]|None = self.__sticker_fallbacks.get(sticker_types)
+            if available_types is None:
+                available_types = list()
+                for selected_type in sticker_types:
+                    if selected_type in sticker_index:
+                        available_types.append(selected_type)
+                    else:
+                        self.logger.error(f"Жодного стикеру типу {selected_type} не було знайдена в базі даних!")
+                self.__sticker_fallbacks[sticker_types] = available_types
+        if len(available_types) < 1:
             raise ValueError
-        return cast(str, random.choice(selected_stickers)["id"])
-
-    def get_rings(self) -> list[TableDicts.RingDict]:
-        cursor: MySQLCursorDict = self._cursor()
-        cursor.execute("SELECT * FROM `ring`")
-        return cast(list[TableDicts.RingDict], cursor.fetchall())
-
-    def get_weekdays(self) -> list[TableDicts.WeekdayDict]:
-        cursor: MySQLCursorDict = self._cursor()
-        cursor.execute("SELECT * FROM `weekday`")
-        return cast(list[TableDicts.WeekdayDict], cursor.fetchall())
-
-    def get_lesson(self, lesson_id: int) -> TableDicts.LessonDict:
-        cursor: MySQLCursorDict = self._cursor()
-        cursor.execute("SELECT * FROM `lesson` WHERE id = %s", [lesson_id])
-        lesson: TableDicts.LessonDict|None = cast(TableDicts.LessonDict|None, cursor.fetchone())
+        return random.choice(sticker_index[random.choice(available_types)])
+
+    def get_rings(self) -> list[TableRows.Ring]:
+        return list(self.snapshot().rings)
+
+    def get_weekdays(self) -> list[TableRows.Weekday]:
+        return list(self.snapshot().weekdays)
+
+    def get_lesson(self, lesson_id: int) -> TableRows.Lesson:
+        lesson: TableRows.Lesson|None = self.snapshot().lessons.get(lesson_id)
         if lesson is None:
             self.logger.error(f"Заняття з айді {lesson_id} не було знайдено в базі даних!")
             raise ValueError
         return lesson
 
-    def get_lessons(self) -> list[TableDicts.LessonDict]:
-        cursor: MySQLCursorDict = self._cursor()
-        cursor.execute("SELECT * FROM `lesson`")
-        return cast(list[TableDicts.LessonDict], cursor.fetchall())
+    def get_lessons(self) -> list[TableRows.Lesson]:
+        return list(self.snapshot().lessons.values())
 
-    def get_timetable_row(self, weekday_id: int, ring_id: int) -> TableDicts.TimetableDict|None:
-        cursor: MySQLCursorDict = self._cursor()
-        cursor.execute("SELECT * FROM `timetable` WHERE weekday_id = %s AND ring_id = %s", [weekday_id, ring_id])
-        return cast(TableDicts.TimetableDict|None, cursor.fetchone())
+    def get_timetable_row(self, weekday_id: int, ring_id: int) -> TableRows.Timetable|None:
+        return self.snapshot().timetable.get((weekday_id, ring_id))
+
+    def get_day_timetable(self, weekday_id: int) -> dict[int, TableRows.Day]:
+        return self.snapshot().days.get(weekday_id, {})
+
+    @contextmanager
+    def __transaction(self) -> Iterator[Cursor]:
+        with self._cursor() as cursor:
+            cursor.execute("START TRANSACTION")
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+
+    def reset_days(self, reset_date: date, weekday_ids: list[int]) -> bool:
+        if len(weekday_ids) < 1:
+            return False
+        with self.__transaction() as cursor:
+            cursor.execute("INSERT IGNORE INTO `day_reset` (`date`, weekday_ids) VALUES (%s, %s)", [reset_date, ",".join(map(str, weekday_ids))])
+            if cursor.rowcount < 1:
+                self.logger.info(f"Заміни та нагадування на {reset_date} вже були очищені.")
+                return False
+            cursor.execute(
+                "UPDATE `timetable` SET remind = NULL, replacement_id = NULL "
+                f"WHERE weekday_id IN ({', '.join(['%s'] * len(weekday_ids))}) AND (remind IS NOT NULL OR replacement_id IS NOT NULL)",
+                weekday_ids
+            )
+            cleared: int = cursor.rowcount
+        if cleared > 0:
+            self.__patch_snapshot(lambda snapshot, version: snapshot.clear_days(version, weekday_ids))
+        return True
 
     def clean_replacement_and_remind(self, weekday_id: int, ring_id: int) -> None:
-        self._cursor().execute("UPDATE `timetable` SET remind = NULL, replacement_id = NULL WHERE weekday_id = %s and ring_id = %s", [weekday_id, ring_id])
-        return
+        with self._cursor() as cursor:
+            cursor.execute(
+                "UPDATE `timetable` SET remind = NULL, replacement_id = NULL "
+                "WHERE weekday_id = %s and ring_id = %s AND (remind IS NOT NULL OR replacement_id IS NOT NULL)",
+                [weekday_id, ring_id]
+            )
+            if cursor.rowcount < 1:
+                return
+        self.__patch_snapshot(lambda snapshot, version: snapshot.patch_timetable(version, weekday_id, ring_id, {"remind": None, "replacement_id": None}))
 
     def update_timetable(self, weekday_id: int, ring_id: int, column_name: str, value: str|int|None) -> None:
-        self._cursor().execute(f"UPDATE `timetable` SET {column_name} = %s WHERE weekday_id = %s and ring_id = %s", [value, weekday_id, ring_id])
+        with self._cursor() as cursor:
+            cursor.execute(f"UPDATE `timetable` SET {column_name} = %s WHERE weekday_id = %s and ring_id = %s", [value, weekday_id, ring_id])
+        self.__patch_snapshot(lambda snapshot, version: snapshot.patch_timetable(version, weekday_id, ring_id, {column_name: value}))
 
     def update_lesson(self, lesson_id: int, column_name: str, value: str|int|None) -> None:
-        self._cursor().execute(f"UPDATE `lesson` SET {column_name} = %s WHERE id = %s", [value, lesson_id])
+        with self._cursor() as cursor:
+            cursor.execute(f"UPDATE `lesson` SET {column_name} = %s WHERE id = %s", [value, lesson_id])
+        self.__patch_snapshot(lambda snapshot, version: snapshot.patch_lesson(version, lesson_id, {column_name: value}))
 
     def update_weekday(self, weekday_id: int, is_work_day: bool) -> None:
-        self._cursor().execute("UPDATE `weekday` SET is_work_day = %s WHERE id = %s", [is_work_day, weekday_id])
+        with self._cursor() as cursor:
+            cursor.execute("UPDATE `weekday` SET is_work_day = %s WHERE id = %s", [is_work_day, weekday_id])
+        self.__patch_snapshot(lambda snapshot, version: snapshot.patch_weekday(version, weekday_id, is_work_day))
 
-    def create_lesson(self, lesson: TableDicts.LessonDict) -> int|None:
-        cursor: MySQLCursorDict = self._cursor()
-        cursor.execute("INSERT INTO `lesson` (name, link, class, max_grade) VALUES (%s, %s, %s, %s)",
-                               [lesson["name"], lesson["link"], lesson["class"], lesson["max_grade"]])
-        return cursor.lastrowid
+    def create_lesson(self, name: str, link: str|None = None, class_: str|None = None, max_grade: int|None = None) -> int|None:
+        with self._cursor() as cursor:
+            cursor.execute("INSERT INTO `lesson` (name, link, class, max_grade) VALUES (%s, %s, %s, %s)", [name, link, class_, max_grade])
+            lesson_id: int|None = cursor.lastrowid
+        if lesson_id is None:
+            self.invalidate_snapshot()
+            return lesson_id
+        self.__patch_snapshot(lambda snapshot, version: snapshot.add_lesson(version, TableRows.Lesson(lesson_id, name, link, class_, max_grade)))
+        return lesson_id
 
     def delete_lesson(self, lesson_id: int) -> None:
-        self._cursor().execute("DELETE FROM `lesson` WHERE id = %s", [lesson_id])
+        with self._cursor() as cursor:
+            cursor.execute("DELETE FROM `lesson` WHERE id = %s", [lesson_id])
+        self.invalidate_snapshot()
+
+    def __iter_keyset(self, query: str, params: list[Any], column: str, page_size: int) -> Iterator[list[int]]:
+        last_id: int|None = None
+        while True:
+            with self._cursor() as cursor:
+                cursor.execute(
+                    query.format(keyset="" if last_id is None else f"AND {column} > %s"),
+                    params + ([] if last_id is None else [last_id]) + [page_size]
+                )
+                page: list[int] = [cast(dict[str, int], row)[column] for row in cursor.fetchall()]
+            if len(page) < 1:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            last_id = page[-1]
+
+    def create_tables(self) -> None:
+        with self._cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS `broadcast` ("
+                "id INT NOT NULL AUTO_INCREMENT PRIMARY KEY, "
+                "`key` VARCHAR(128) NOT NULL UNIQUE, "
+                "text TEXT NOT NULL, "
+                "sticker_id VARCHAR(255) NULL, "
+                "expires_at DATETIME NULL, "
+                "created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS `outbox` ("
+                "broadcast_id INT NOT NULL, "
+                "chat_id BIGINT NOT NULL, "
+                "status VARCHAR(16) NOT NULL DEFAULT 'pending', "
+                "PRIMARY KEY (broadcast_id, chat_id), "
+                "FOREIGN KEY (broadcast_id) REFERENCES `broadcast` (id) ON DELETE CASCADE)"
+            )
+            try:
+                cursor.execute("CREATE INDEX outbox_status ON `outbox` (status, broadcast_id)")
+            except Exception as exception:
+                if getattr(exception, "errno", None) != 1061:
+                    raise
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS `day_reset` ("
+                "`date` DATE NOT NULL PRIMARY KEY, "
+                "weekday_ids VARCHAR(64) NOT NULL, "
+                "reset_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS `conversation` ("
+                "chat_id BIGINT NOT NULL, "
+                "user_id BIGINT NOT NULL, "
+                "state TEXT NOT NULL, "
+                "expires_at DOUBLE NOT NULL, "
+                "PRIMARY KEY (chat_id, user_id))"
+            )
+
+    def get_conversations(self, now: float) -> list[TableDicts.ConversationDict]:
+        with self._cursor() as cursor:
+            cursor.execute("DELETE FROM `conversation` WHERE expires_at <= %s", [now])
+            cursor.execute("SELECT * FROM `conversation` ORDER BY expires_at")
+            return cast(list[TableDicts.ConversationDict], cursor.fetchall())
+
+    def set_conversation(self, chat_id: int, user_id: int, state: str, expires_at: float) -> None:
+        with self._cursor() as cursor:
+            cursor.execute("REPLACE INTO `conversation` (chat_id, user_id, state, expires_at) VALUES (%s, %s, %s, %s)", [chat_id, user_id, state, expires_at])
+
+    def delete_conversation(self, chat_id: int, user_id: int) -> None:
+        with self._cursor() as cursor:
+            cursor.execute("DELETE FROM `conversation` WHERE chat_id = %s AND user_id = %s", [chat_id, user_id])
+
+    def create_broadcast(self, key: str, text: str, sticker_id: str|None, expires_at: datetime|None, created_at: datetime) -> TableDicts.BroadcastDict|None:
+        with self.__transaction() as cursor:
+            cursor.execute("INSERT IGNORE INTO `broadcast` (`key`, text, sticker_id, expires_at, created_at) VALUES (%s, %s, %s, %s, %s)",
+                           [key, text, sticker_id, expires_at, created_at])
+            if cursor.rowcount < 1:
+                self.logger.warning(f"Розсилка \"{key}\" вже була створена раніше, повторно не створюється.")
+                return None
+            broadcast_id: int|None = cursor.lastrowid
+            cursor.execute("INSERT INTO `outbox` (broadcast_id, chat_id) SELECT %s, id FROM `user` WHERE is_subscriber = 1", [broadcast_id])
+            cursor.execute("SELECT * FROM `broadcast` WHERE id = %s", [broadcast_id])
+            return cast(TableDicts.BroadcastDict|None, cursor.fetchone())
+
+    def get_pending_broadcasts(self) -> list[TableDicts.BroadcastDict]:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT * FROM `broadcast` WHERE id IN (SELECT broadcast_id FROM `outbox` WHERE status = 'pending') ORDER BY id")
+            return cast(list[TableDicts.BroadcastDict], cursor.fetchall())
+
+    def iter_pending_chats(self, broadcast_id: int, page_size: int = 1000) -> Iterator[list[int]]:
+        return self.__iter_keyset(
+            "SELECT chat_id FROM `outbox` WHERE broadcast_id = %s AND status = 'pending' {keyset} ORDER BY chat_id LIMIT %s",
+            [broadcast_id], "chat_id", page_size
+        )
+
+    def set_outbox_status(self, broadcast_id: int, chat_ids: list[int], status: str) -> None:
+        if len(chat_ids) < 1:
+            return
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"UPDATE `outbox` SET status = %s WHERE broadcast_id = %s AND chat_id IN ({', '.join(['%s'] * len(chat_ids))})",
+                [status, broadcast_id, *chat_ids]
+            )
+
+    def prune_broadcasts(self, before: datetime, keep: timedelta = timedelta(days=1)) -> int:
+        before = before.replace(tzinfo=None)
+        with self._cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM `broadcast` WHERE expires_at < %s OR (expires_at IS NULL AND created_at < %s "
+                "AND id NOT IN (SELECT broadcast_id FROM `outbox` WHERE status = 'pending'))",
+                [before, before - keep]
+            )
+            return cursor.rowcount
 
-    def get_subscribed_users(self) -> list[TableDicts.UserDict]:
-        cursor: MySQLCursorDict = self._cursor()
-        cursor.execute("SELECT * FROM `user` WHERE is_subscriber = 1")
-        return cast(list[TableDicts.UserDict], cursor.fetchall())
+    def expire_broadcast(self, broadcast_id: int) -> None:
+        with self._cursor() as cursor:
+            cursor.execute("UPDATE `outbox` SET status = 'expired' WHERE broadcast_id = %s AND status = 'pending'", [broadcast_id])
@@ -0,0 +1,142 @@
+import re
+import time
+import logging
+from functools import wraps
+from collections import Counter
+from contextvars import ContextVar
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Iterator, Sequence
+
+from .storage import Cursor
+
+class _Trace:
+    def __init__(self, tag: str):
+        self.tag: str = tag
+        self.statements: int = 0
+        self.duration: float = 0
+        self.fingerprints: Counter[str] = Counter()
+
+
+class _TracingCursor:
+    def __init__(self, cursor: Cursor, tracer: "SQLTracer"):
+        self.__cursor: Cursor = cursor
+        self.__tracer: SQLTracer = tracer
+
+    @property
+    def rowcount(self) -> int:
+        return self.__cursor.rowcount
+
+    @property
+    def lastrowid(self) -> int|None:
+        return self.__cursor.lastrowid
+
+    def execute(self, operation: str, params: Sequence[Any] = ()) -> Any:
+        started: float = time.perf_counter()
+        try:
+            return self.__cursor.execute(operation, params)
+        finally:
+            self.__tracer.record(operation, time.perf_counter() - started)
+
+    def executemany(self, operation: str, seq_params: Sequence[Sequence[Any]]) -> Any:
+        started: float = time.perf_counter()
+        try:
+            return self.__cursor.executemany(operation, seq_params)
+        finally:
+            self.__tracer.record(operation, time.perf_counter() - started)
+
+    def fetchone(self) -> Any:
+        return self.__cursor.fetchone()
+
+    def fetchall(self) -> list[Any]:
+        return self.__cursor.fetchall()
+
+
+class SQLTracer:
+    __placeholders = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+    __numbers = re.compile(r"\b\d+\b")
+    __spaces = re.compile(r"\s+")
+
+    def __init__(self, cursor: Callable[[], ContextManager[Cursor]], logger: logging.Logger, budget: int = 10):
+        self.__cursor: Callable[[], ContextManager[Cursor]] = cursor
+        self.logger: logging.Logger = logger
+        self.budget: int = budget
+        self.__current: ContextVar[_Trace|None] = ContextVar("sql_trace", default=None)
+
+    @classmethod
+    def fingerprint(cls, operation: str) -> str:
+        operation = cls.__placeholders.sub("(%s, ...)", operation)
+        return cls.__spaces.sub(' ', cls.__numbers.sub('?', operation)).strip()
+
+    @contextmanager
+    def cursor(self) -> Iterator[_TracingCursor]:
+        with self.__cursor() as cursor:
+            yield _TracingCursor(cursor, self)
+
+    def record(self, operation: str, seconds: float) -> None:
+        trace: _Trace|None = self.__current.get()
+        if trace is None:
+            return
+        trace.statements += 1
+        trace.duration += seconds
+        trace.fingerprints[self.fingerprint(operation)] += 1
+
+    @contextmanager
+    def trace(self, tag: str) -> Iterator[None]:
+        if self.__current.get() is not None:
+            yield
+            return
+        trace: _Trace = _Trace(tag)
+        token = self.__current.set(trace)
+        try:
+            yield
+        finally:
+            self.__current.reset(token)
+            self.report(trace)
+
+    def report(self, trace: _Trace) -> None:
+        if trace.statements < 1:
+            return
+        message: str = f"SQL [{trace.tag}]: {trace.statements} запитів, {trace.duration * 1000:.2f} мс у БД."
+        repeated: list[tuple[str, int]] = [(fingerprint, count) for fingerprint, count in trace.fingerprints.most_common(3) if count > 1]
+        if len(repeated) > 0:
+            message += " Повтори: " + "; ".join(f"{count}× {fingerprint[:160]}" for fingerprint, count in repeated)
+        if trace.statements > self.budget:
+            self.logger.warning(f"{message} Перевищено бюджет у {self.budget} запитів!")
+        else:
+            self.logger.info(message)
+
+    @staticmethod
+    def describe(update: Any) -> str:
+        chat: Any = getattr(update, "chat", None) or getattr(getattr(update, "message", None), "chat", None)
+        content: str|None = getattr(update, "text", None) or getattr(update, "data", None)
+        identifier: Any = getattr(update, "message_id", None) or getattr(update, "id", None)
+        return " ".join(
+            part for part in [type(update).__name__, f"chat={chat.id}" if chat is not None else "", f"id={identifier}", (content or "")[:32]] if part
+        )
+
+    def trace_bot(self, bot: Any) -> None:
+        if hasattr(bot, "_run_middlewares_and_handlers"):
+            run_handlers: Callable[..., Any] = bot._run_middlewares_and_handlers
+
+            @wraps(run_handlers)
+            async def traced_run_handlers(message: Any, *args, **kwargs):
+                with self.trace(self.describe(message)):
+                    return await run_handlers(message, *args, **kwargs)
+            bot._run_middlewares_and_handlers = traced_run_handlers
+            return
+
+        exec_task: Callable[..., Any] = bot._exec_task
+
+        @wraps(exec_task)
+        def traced_exec_task(task: Callable[..., Any], *args, **kwargs):
+            tag: str = self.describe(args[0]) if len(args) > 0 else getattr(task, "__name__", "task")
+
+            @wraps(task)
+            def traced_task(*task_args, **task_kwargs):
+                with self.trace(tag):
+                    return task(*task_args, **task_kwargs)
+            return exec_task(traced_task, *args, **kwargs)
+        bot._exec_task = traced_exec_task
+
+if __name__ == "__main__":
+    exit()
@@ -0,0 +1,144 @@
+import queue
+import logging
+import sqlite3
+from datetime import date, datetime
+from threading import Lock
+from functools import lru_cache
+from contextlib import contextmanager
+from typing import Any, Iterator, Sequence
+
+from .storage import StorageBackend
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' '))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS `ring` (
+    id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, start DATETIME NOT NULL, end DATETIME NOT NULL
+);
+CREATE TABLE IF NOT EXISTS `weekday` (
+    id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, is_work_day BOOLEAN NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS `lesson` (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(255) NOT NULL, link VARCHAR(255) NULL, class VARCHAR(255) NULL, max_grade INT NULL
+);
+CREATE TABLE IF NOT EXISTS `timetable` (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, weekday_id INT NOT NULL, ring_id INT NOT NULL, lesson_id INT NOT NULL DEFAULT 1,
+    flasher_id INT NULL, replacement_id INT NULL, remind TEXT NULL, UNIQUE (weekday_id, ring_id)
+);
+CREATE TABLE IF NOT EXISTS `user` (id BIGINT PRIMARY KEY, is_subscriber BOOLEAN NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS `sticker` (id VARCHAR(255) PRIMARY KEY, type VARCHAR(64) NOT NULL);
+INSERT OR IGNORE INTO `weekday` VALUES
+    (1, 'Понеділок', 1), (2, 'Вівторок', 1), (3, 'Середа', 1), (4, 'Четвер', 1), (5, 'П''ятниця', 1), (6, 'Субота', 0), (7, 'Неділя', 0);
+INSERT OR IGNORE INTO `lesson` (id, name) VALUES (1, 'Немає');
+"""
+
+DIALECT: list[tuple[str, str]] = [
+    ("%s", "?"),
+    ("INSERT IGNORE", "INSERT OR IGNORE"),
+    ("START TRANSACTION", "BEGIN IMMEDIATE"),
+    ("CREATE INDEX", "CREATE INDEX IF NOT EXISTS"),
+    ("INT NOT NULL AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+]
+
+@lru_cache(maxsize=1024)
+def translate(operation: str) -> str:
+    for mysql, sqlite in DIALECT:
+        operation = operation.replace(mysql, sqlite)
+    return operation
+
+def dict_row(cursor: sqlite3.Cursor, row: tuple[Any, ...]) -> dict[str, Any]:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    def __init__(self, cursor: sqlite3.Cursor):
+        self.__cursor: sqlite3.Cursor = cursor
+
+    @property
+    def rowcount(self) -> int:
+        return self.__cursor.rowcount
+
+    @property
+    def lastrowid(self) -> int|None:
+        return self.__cursor.lastrowid
+
+    def execute(self, operation: str, params: Sequence[Any] = ()) -> None:
+        self.__cursor.execute(translate(operation), tuple(params))
+
+    def executemany(self, operation: str, seq_params: Sequence[Sequence[Any]]) -> None:
+        self.__cursor.executemany(translate(operation), [tuple(params) for params in seq_params])
+
+    def fetchone(self) -> dict[str, Any]|None:
+        return self.__cursor.fetchone()
+
+    def fetchall(self) -> list[dict[str, Any]]:
+        return self.__cursor.fetchall()
+
+    def close(self) -> None:
+        self.__cursor.close()
+
+
+class SQLite(StorageBackend):
+    def __init__(self, filename: str, logger: logging.Logger, pool_size: int = 5, busy_timeout: float = 5.0, lazy: bool = False):
+        self.filename: str = filename
+        self.logger: logging.Logger = logger
+        self.pool_size: int = pool_size
+        self.busy_timeout: float = busy_timeout
+        self.__pool: queue.LifoQueue[sqlite3.Connection]|None = None
+        self.__connect_lock: Lock = Lock()
+        if not lazy:
+            self.connect()
+
+    def __open(self) -> sqlite3.Connection:
+        connection: sqlite3.Connection = sqlite3.connect(
+            self.filename, timeout=self.busy_timeout, detect_types=sqlite3.PARSE_DECLTYPES, isolation_level=None, check_same_thread=False
+        )
+        connection.row_factory = dict_row
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    def connect(self) -> None:
+        try:
+            pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(self.pool_size)
+            for _ in range(self.pool_size):
+                pool.put(self.__open())
+            pool.queue[-1].executescript(SCHEMA)
+        except sqlite3.Error as error:
+            self.logger.error(f"Database connection error: \"{error}\"")
+            raise
+        self.__pool = pool
+
+    @contextmanager
+    def cursor(self) -> Iterator[SQLiteCursor]:
+        if self.__pool is None:
+            with self.__connect_lock:
+                if self.__pool is None:
+                    self.connect()
+        assert self.__pool is not None
+        pool: queue.LifoQueue[sqlite3.Connection] = self.__pool
+        connection: sqlite3.Connection = pool.get()
+        try:
+            cursor: SQLiteCursor = SQLiteCursor(connection.cursor())
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+        finally:
+            pool.put(connection)
+
+    def close(self) -> bool:
+        if self.__pool is None:
+            return False
+        pool: queue.LifoQueue[sqlite3.Connection] = self.__pool
+        self.__pool = None
+        while not pool.empty():
+            pool.get_nowait().close()
+        return True
+
+if __name__ == "__main__":
+    exit()
@@ -0,0 +1,55 @@
+import os
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, ContextManager, Protocol, Sequence
+
+class Cursor(Protocol):
+    rowcount: int
+    lastrowid: int|None
+
+    def execute(self, operation: str, params: Sequence[Any] = ...) -> Any: ...
+
+    def executemany(self, operation: str, seq_params: Sequence[Sequence[Any]]) -> Any: ...
+
+    def fetchone(self) -> Any: ...
+
+    def fetchall(self) -> list[Any]: ...
+
+
+class StorageBackend(ABC):
+    pool_size: int
+
+    @abstractmethod
+    def cursor(self) -> ContextManager[Cursor]: ...
+
+    @abstractmethod
+    def close(self) -> bool: ...
+
+
+def create_storage(logger: logging.Logger, lazy: bool = False) -> StorageBackend:
+    backend: str = os.environ.get("DB_BACKEND", "mysql").strip().lower()
+    pool_size: int = int(os.environ.get("DB_POOL_SIZE", 5))
+    match backend:
+        case "mysql":
+            from .my_sql import MySQL
+            return MySQL(
+                {
+                    "user": os.environ["DB_USER"],
+                    "password": os.environ["DB_PASSWORD"],
+                    "host": os.environ["DB_HOST"],
+                    "database": os.environ["DB_NAME"],
+                    "autocommit": True
+                },
+                logger,
+                pool_size=pool_size,
+                lazy=lazy
+            )
+        case "sqlite":
+            from .sqlite_db import SQLite
+            return SQLite(os.environ["DB_PATH"], logger, pool_size=pool_size, lazy=lazy)
+        case _:
+            logger.critical(f"Невідомий тип бази даних \"{backend}\"! (DB_BACKEND може бути mysql або sqlite)")
+            raise ValueError(backend)
+
+if __name__ == "__main__":
+    exit()
@@ -1,107 +1,157 @@
 ﻿from logging import Logger
+from threading import Lock
 from typing import overload, cast
+from dataclasses import replace
 from datetime import date, datetime, timedelta
 from functools import singledispatchmethod
 
 from .json_file import JSON_File
 from .sql_queries import Queries
-from .dict_types import TableDicts, TimetableDicts
+from .render_cache import RenderCache
+from .ring_index import RingIndex
+from .snapshot import TimetableSnapshot
+from .dict_types import TableRows, TimetableDicts
 
 class Timetable:
     def __init__(self, queries: Queries, logger: Logger, json_file: JSON_File):
         self.queries = queries
         self.logger = logger
         self.json_file = json_file
+        self.__days: dict[tuple[int, int|None], TimetableDicts.DayDict] = dict()
+        self.__days_version: int|None = None
+        self.__days_lock: Lock = Lock()
+        self.__ring_index: RingIndex|None = None
+        self.render_cache: RenderCache = RenderCache()
 
 
-    def get_next_workday(self, weekday: int) -> TableDicts.WeekdayDict|None:
-        weekdays: list[TableDicts.WeekdayDict] = self.queries.get_weekdays()
+    def get_next_workday(self, weekday: int) -> TableRows.Weekday|None:
+        weekdays: list[TableRows.Weekday] = self.queries.get_weekdays()
         for day in range(1, 8):
             day_index = (weekday + day) % 7
-            if weekdays[day_index]["is_work_day"]:
+            if weekdays[day_index].is_work_day:
                 return weekdays[day_index]
         return None
 
-    def get_normilized_lesson(self, lesson: TableDicts.LessonDict, flasher: TableDicts.LessonDict|None, remind: str|None = None) -> TimetableDicts.LessonDict:
+    def get_normilized_lesson(self, lesson: TableRows.Lesson, flasher: TableRows.Lesson|None, remind: str|None = None) -> TimetableDicts.LessonDict:
         if flasher is not None:
             return {
-                "name": f"<b><i>{lesson['name']} / {flasher['name']}</i></b>",
-                "link": (f"\n\n<b>Посилання на заняття ({lesson['name']}):</b>\n{lesson['link'] or 'Немає посилання'}"
-                         f"\n\n<b>Посилання на клас:</b>\n{lesson['class'] or 'Немає посилання'}"
-                         f"\n\n\n<b>Посилання на заняття ({flasher['name']}):</b>\n{flasher['link'] or 'Немає посилання'}"
-                         f"\n\n<b>Посилання на клас:</b> \n{flasher['class'] or 'Немає посилання'}"),
+                "name": f"<b><i>{lesson.name} / {flasher.name}</i></b>",
+                "link": (f"\n\n<b>Посилання на заняття ({lesson.name}):</b>\n{lesson.link or 'Немає посилання'}"
+                         f"\n\n<b>Посилання на клас:</b>\n{lesson.class_ or 'Немає посилання'}"
+                         f"\n\n\n<b>Посилання на заняття ({flasher.name}):</b>\n{flasher.link or 'Немає посилання'}"
+                         f"\n\n<b>Посилання на клас:</b> \n{flasher.class_ or 'Немає посилання'}"),
                 "remind": remind,
-                "lesson_id": lesson["id"]
+                "lesson_id": lesson.id
             }
         return  {
-            "name": f"<b><i>{lesson['name']}</i></b>",
-            "link": (f"\n\n<b>Посилання на заняття:</b>\n{lesson['link'] or 'Немає посилання'}"
-                        f"\n\n<b>Посилання на клас:</b>\n{lesson['class'] or 'Немає посилання'}"),
+            "name": f"<b><i>{lesson.name}</i></b>",
+            "link": (f"\n\n<b>Посилання на заняття:</b>\n{lesson.link or 'Немає посилання'}"
+                        f"\n\n<b>Посилання на клас:</b>\n{lesson.class_ or 'Немає посилання'}"),
             "remind": remind,
-            "lesson_id": lesson["id"]
+            "lesson_id": lesson.id
         }
 
+    def get_week_parity(self, target_date: date) -> int:
+        try:
+            first_flasher_monday = date.fromisoformat(cast(str, self.json_file.get("first_flasher_monday")))
+        except ValueError:
+            self.logger.error("Змінна \"first_flasher_monday\" не була знайдена в JSON файлі! Помилка не оброблена!")
+            raise 
+        return ((target_date - timedelta(days=target_date.weekday()) - first_flasher_monday).days // 7) % 2
+
     def get_lesson(self, isoweekday: int, lesson_number: int, target_date: date|None = None) -> TimetableDicts.LessonDict|None:
-        timetable: TableDicts.TimetableDict|None = cast(TableDicts.TimetableDict|None, self.queries.get_timetable_row(isoweekday, lesson_number))
+        lessons: list[TimetableDicts.LessonDict|None] = self.get_day(isoweekday, target_date)["lessons"]
+        return lessons[lesson_number - 1] if 0 < lesson_number <= len(lessons) else None
+
+    def get_row_lesson(self, timetable: TableRows.Day|None, week_parity: int|None = None) -> TimetableDicts.LessonDict|None:
         if timetable is None:
             return None
 
-        remind: str|None = None if timetable["remind"] is None else f"\n\nНагадування:\n{timetable['remind']}"
+        remind: str|None = None if timetable.remind is None else f"\n\nНагадування:\n{timetable.remind}"
 
-        if isinstance(timetable["replacement_id"], int):
-            lesson: TableDicts.LessonDict = self.queries.get_lesson(timetable["replacement_id"])
-            lesson["name"] += " (заміна)"
+        if timetable.replacement is not None:
+            lesson: TableRows.Lesson = replace(timetable.replacement, name=timetable.replacement.name + " (заміна)")
             flasher = None
+        elif timetable.lesson is not None:
+            lesson: TableRows.Lesson = timetable.lesson
+            flasher: TableRows.Lesson|None = timetable.flasher
         else:
-            lesson: TableDicts.LessonDict = self.queries.get_lesson(timetable["lesson_id"])
-            flasher: TableDicts.LessonDict|None = self.queries.get_lesson(timetable["flasher_id"]) if timetable["flasher_id"] is not None else None
-
-        if target_date is not None or isinstance(timetable["replacement_id"], int) or flasher is None:
-            if flasher is not None and isinstance(target_date, date):
-                try:
-                    first_flasher_monday = date.fromisoformat(cast(str, self.json_file.get("first_flasher_monday")))
-                except ValueError:
-                    self.logger.error("Змінна \"first_flasher_monday\" не була знайдена в JSON файлі! Помилка не оброблена!")
-                    raise 
-                if ((target_date - timedelta(days=target_date.weekday()) - first_flasher_monday).days // 7) % 2:
-                    lesson = flasher            
+            self.logger.error(f"Заняття для дня {timetable.weekday_id} та дзвінка {timetable.ring_id} не було знайдено в базі даних!")
+            raise ValueError
+
+        if week_parity is not None or timetable.replacement is not None or flasher is None:
+            if flasher is not None and week_parity:
+                lesson = flasher
             return self.get_normilized_lesson(lesson, None, remind)
         return self.get_normilized_lesson(lesson, flasher, remind)
 
-    def get_rings(self, target_date: date) -> list[TableDicts.RingDict]:
-        rings: list[TableDicts.RingDict] = self.queries.get_rings()
-        for ring in rings:
-            for key in ["start", "end"]:
-                ring[key] = datetime.combine(target_date, ring[key].time())
-        return rings
-
+    def get_day(self, weekday_id: int, target_date: date|None = None) -> TimetableDicts.DayDict:
+        snapshot_version: int = self.queries.snapshot().version
+        week_parity: int|None = self.get_week_parity(target_date) if target_date is not None else None
+        with self.__days_lock:
+            if self.__days_version != snapshot_version:
+                self.__days = dict()
+                self.__days_version = snapshot_version
+            day: TimetableDicts.DayDict|None = self.__days.get((weekday_id, week_parity))
+        if day is not None:
+            return day
+
+        timetable: dict[int, TableRows.Day] = self.queries.get_day_timetable(weekday_id)
+        rings: list[TableRows.Ring] = self.queries.get_rings()
+        lessons: list[TimetableDicts.LessonDict|None] = [self.get_row_lesson(timetable.get(ring.id), week_parity) for ring in rings]
+        next_lesson: list[int|None] = [None] * (len(lessons) + 1)
+        last_lesson: int|None = None
+        for lesson_index in range(len(lessons) - 1, -1, -1):
+            lesson: TimetableDicts.LessonDict|None = lessons[lesson_index]
+            if lesson is not None and lesson["lesson_id"] != 1:
+                next_lesson[lesson_index] = lesson_index
+                last_lesson = lesson_index if last_lesson is None else last_lesson
+            else:
+                next_lesson[lesson_index] = next_lesson[lesson_index + 1]
+        day = {"lessons": lessons, "next_lesson": next_lesson, "last_lesson": last_lesson}
+        with self.__days_lock:
+            if self.__days_version == snapshot_version:
+                self.__days[(weekday_id, week_parity)] = day
+        return day
+
+    def get_rings(self, target_date: date) -> list[TableRows.Ring]:
+        ring_index: RingIndex = self.get_ring_index()
+        return [
+            replace(ring, start=ring_index.at(target_date, start), end=ring_index.at(target_date, end))
+            for ring, start, end in zip(ring_index.rings, ring_index.starts, ring_index.ends)
+        ]
+
+
+    def get_ring_index(self) -> RingIndex:
+        snapshot: TimetableSnapshot = self.queries.snapshot()
+        ring_index: RingIndex|None = self.__ring_index
+        if ring_index is None or ring_index.version != snapshot.version:
+            ring_index = self.__ring_index = RingIndex(snapshot.version, snapshot.rings)
+        return ring_index
 
     def find_lesson(self, date_time: datetime) -> TimetableDicts.FoundLessonDict|str:
-        date_time = date_time.replace(tzinfo=None)
-        rings: list[TableDicts.RingDict] = self.get_rings(date_time.date())
-        if not self.queries.get_weekdays()[date_time.weekday()]["is_work_day"]:
+        if not self.queries.get_weekdays()[date_time.weekday()].is_work_day:
             return "Сьогодні вихідний! Відпочиньте\n(p≧w≦q)"
-        if (rings[0]["start"] - timedelta(minutes=5)) > date_time:
+        ring_index: RingIndex = self.get_ring_index()
+        offset: float = ring_index.offset(date_time)
+        if ring_index.is_early(offset):
             return "Ще дуже рано! Відпочиньте\n( *︾▽︾)"
-        if rings[-1]["end"] < date_time:
+        if ring_index.is_over(offset):
             return "Заняття вже закінчились! Відпочиньте\no(*^▽^*)┛"
-        for ring in rings:
-            if (ring["start"] - timedelta(minutes=5)) < date_time < ring["end"]:
-                break
-        else:
+        position: int|None = ring_index.find(offset)
+        if position is None:
             return "Зараз перерва, відпочиньте!\nლ(╹◡╹ლ)"
-        return {"lesson": self.get_lesson(date_time.isoweekday(), ring["id"], date_time.date()), "ring": ring}
+        ring: TableRows.Ring = replace(ring_index.rings[position], start=ring_index.at(date_time.date(), ring_index.starts[position]),
+                                       end=ring_index.at(date_time.date(), ring_index.ends[position]))
+        return {"lesson": self.get_lesson(date_time.isoweekday(), ring.id, date_time.date()), "ring": ring}
 
     def find_next_lesson(self, isoweekday: int, lesson_number: int, target_date: date|None) -> TimetableDicts.FoundLessonDict|None:
-        rings: list[TableDicts.RingDict] = self.queries.get_rings() if target_date is None else self.get_rings(target_date)
-        next_lesson: TimetableDicts.LessonDict|None = None
-        for ring_id in range(lesson_number + 1, len(rings) + 1):
-            next_lesson = self.get_lesson(isoweekday, ring_id, target_date)
-            if next_lesson is not None and next_lesson["lesson_id"] != 1:
-                break
-            else:
-                next_lesson = None
-        return {"lesson": next_lesson, "ring": rings[ring_id - 1]} if next_lesson is not None else None
+        day: TimetableDicts.DayDict = self.get_day(isoweekday, target_date)
+        next_lesson: int|None = day["next_lesson"][max(0, min(lesson_number, len(day["lessons"])))]
+        if next_lesson is None:
+            return None
+        ring: TableRows.Ring = self.get_ring_index().rings[next_lesson] if target_date is None else self.get_rings(target_date)[next_lesson]
+        return {"lesson": day["lessons"][next_lesson], "ring": ring}
         
 
     @overload
@@ -116,22 +166,40 @@ class Timetable:
     def get_timetable(self, _) -> str:
         raise ValueError("Має бути задан тільки один аргумент, або datetime, або int!")
 
-    def __get_timetable(self, weekday: TableDicts.WeekdayDict, target_date: date|None, display_rings: bool = False) -> str:
-        if not weekday["is_work_day"]:
-            return f"{' ' * 2}<b>{weekday['name']}</b>:\n{' ' * 4}<b><i>Вихідний!</i></b> ヾ(≧▽≦*)o"
+    def get_week_timetable(self) -> str:
+        return self.render_cache.get(("week",), self.queries.snapshot().version, None,
+                                     lambda: "\n\n".join(["<b>Розклад:</b>\n"] + [self.get_timetable(weekday) for weekday in range(7)]))
+
+    def get_rings_timetable(self) -> str:
+        return self.render_cache.get(("rings",), self.queries.snapshot().version, None, lambda: ";\n".join(
+            [
+                f"{ring.id} {ring.name.split(' ')[1]}: <b><i>{ring.start.strftime('%H:%M')} - {ring.end.strftime('%H:%M')}</i></b>" 
+                for ring in self.queries.get_rings()
+            ]
+        ) + '.')
+
+    def __get_timetable(self, weekday: TableRows.Weekday, target_date: date|None, display_rings: bool = False) -> str:
+        return self.render_cache.get(("timetable", weekday.id, display_rings), self.queries.snapshot().version,
+                                     self.get_week_parity(target_date) if target_date is not None else None,
+                                     lambda: self.__render_timetable(weekday, target_date, display_rings))
+
+    def __render_timetable(self, weekday: TableRows.Weekday, target_date: date|None, display_rings: bool = False) -> str:
+        if not weekday.is_work_day:
+            return f"{' ' * 2}<b>{weekday.name}</b>:\n{' ' * 4}<b><i>Вихідний!</i></b> ヾ(≧▽≦*)o"
         else:
             timetable = list()
-            rings: list[TableDicts.RingDict] = self.queries.get_rings()
-            for ring in rings:
-                lesson: TimetableDicts.LessonDict|None = self.get_lesson(weekday["id"], ring["id"], target_date)
-                line_prefix: str = f"{ring['start'].strftime('%H:%M')} - {ring['end'].strftime('%H:%M')}" if display_rings else f"{ring['id']} {ring['name'].split(' ')[1]}"
+            rings: list[TableRows.Ring] = self.queries.get_rings()
+            day: TimetableDicts.DayDict = self.get_day(weekday.id, target_date)
+            for ring_index, ring in enumerate(rings):
+                lesson: TimetableDicts.LessonDict|None = day["lessons"][ring_index]
+                line_prefix: str = f"{ring.start.strftime('%H:%M')} - {ring.end.strftime('%H:%M')}" if display_rings else f"{ring.id} {ring.name.split(' ')[1]}"
                 if lesson is not None:
-                    if lesson["lesson_id"] == 1 and self.find_next_lesson(weekday["id"], ring["id"], target_date) is None:
+                    if lesson["lesson_id"] == 1 and (day["last_lesson"] is None or ring_index > day["last_lesson"]):
                         break
                     timetable.append(f"{' ' * 4}<b>{line_prefix}:</b> {lesson['name']}")
                 else:
                     timetable.append(f"{' ' * 4}<b>{line_prefix}:</b> Не знайдено! (≧﹏ ≦)")
-            return (f"{' ' * 2}<b>{weekday['name']}</b>:\n" +
+            return (f"{' ' * 2}<b>{weekday.name}</b>:\n" +
                     ((";\n".join(timetable) + '.') if len(timetable) > 0 else f"{' ' * 4}<b><i>Вихідний!</i></b> ヾ(≧▽≦*)o"))
 
     @get_timetable.register
@@ -0,0 +1,76 @@
+import time
+from threading import Lock
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar, cast
+
+_Value = TypeVar("_Value")
+
+class TTLCache(Generic[_Value]):
+    def __init__(self, ttl: float, negative_ttl: float = 0, max_size: int = 4096):
+        self.ttl: float = ttl
+        self.negative_ttl: float = negative_ttl
+        self.max_size: int = max_size
+        self.__entries: OrderedDict[Hashable, tuple[float, _Value|None, Exception|None]] = OrderedDict()
+        self.__lock: Lock = Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __lookup(self, key: Hashable) -> tuple[bool, _Value|None]:
+        with self.__lock:
+            entry: tuple[float, _Value|None, Exception|None]|None = self.__entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                self.__entries.move_to_end(key)
+                if entry[2] is not None:
+                    raise entry[2].with_traceback(None)
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def __fail(self, key: Hashable, error: Exception) -> None:
+        if self.negative_ttl > 0:
+            self.__store(key, (time.monotonic() + self.negative_ttl, None, error))
+
+    def get(self, key: Hashable, load: Callable[[], _Value], errors: tuple[type[Exception], ...] = ()) -> _Value:
+        found, cached = self.__lookup(key)
+        if found:
+            return cast(_Value, cached)
+        try:
+            value: _Value = load()
+        except errors as error:
+            self.__fail(key, error)
+            raise
+        self.__store(key, (time.monotonic() + self.ttl, value, None))
+        return value
+
+    async def get_async(self, key: Hashable, load: Callable[[], Awaitable[_Value]], errors: tuple[type[Exception], ...] = ()) -> _Value:
+        found, cached = self.__lookup(key)
+        if found:
+            return cast(_Value, cached)
+        try:
+            value: _Value = await load()
+        except errors as error:
+            self.__fail(key, error)
+            raise
+        self.__store(key, (time.monotonic() + self.ttl, value, None))
+        return value
+
+    def set(self, key: Hashable, value: _Value) -> None:
+        self.__store(key, (time.monotonic() + self.ttl, value, None))
+
+    def __store(self, key: Hashable, entry: tuple[float, _Value|None, Exception|None]) -> None:
+        with self.__lock:
+            self.__entries[key] = entry
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable|None = None) -> None:
+        with self.__lock:
+            if key is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(key, None)
+
+if __name__ == "__main__":
+    exit()
@@ -0,0 +1,168 @@
+import json
+import queue
+import logging
+from threading import Lock, Thread
+from collections import OrderedDict
+from socketserver import ThreadingMixIn
+from typing import Any, Callable, Iterable
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from telebot import TeleBot, util
+from telebot.types import Update
+
+from .metrics import Metrics
+
+_StartResponse = Callable[[str, list[tuple[str, str]]], Any]
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+
+class _UpdateWindow:
+    def __init__(self, size: int):
+        self.size: int = size
+        self.__seen: OrderedDict[int, None] = OrderedDict()
+
+    def __contains__(self, update_id: int) -> bool:
+        return update_id in self.__seen
+
+    def add(self, update_id: int) -> None:
+        self.__seen[update_id] = None
+        if len(self.__seen) > self.size:
+            self.__seen.popitem(last=False)
+
+
+class WebhookServer:
+    secret_header: str = "HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN"
+    max_body_size: int = 1024 * 1024
+
+    def __init__(self, bot: TeleBot, logger: logging.Logger, path: str = "/webhook", secret_token: str|None = None,
+                 workers: int = 8, queue_size: int = 1000, window_size: int = 10000, metrics: Metrics|None = None):
+        self.bot: TeleBot = bot
+        self.logger: logging.Logger = logger
+        self.path: str = path
+        self.secret_token: str|None = secret_token or None
+        self.workers: int = workers
+        self.metrics: Metrics = metrics or Metrics(logger, enabled=False)
+        self.__queues: list[queue.Queue[Update|None]] = [queue.Queue(max(1, queue_size // workers)) for _ in range(workers)]
+        self.__window: _UpdateWindow = _UpdateWindow(window_size)
+        self.__lock: Lock = Lock()
+        self.__threads: list[Thread] = list()
+        self.__server: _ThreadingWSGIServer|None = None
+        self.bot.threaded = False
+        self.metrics.add_collector(lambda: [("webhook_queue_depth", {}, sum(shard.qsize() for shard in self.__queues))])
+
+    @staticmethod
+    def chat_id(update: Update) -> int:
+        for content in [update.message, update.edited_message, update.channel_post, update.edited_channel_post,
+                        update.callback_query, update.my_chat_member, update.chat_member]:
+            if content is None:
+                continue
+            chat: Any = getattr(content, "chat", None) or getattr(getattr(content, "message", None), "chat", None)
+            if chat is not None:
+                return chat.id
+            from_user: Any = getattr(content, "from_user", None)
+            if from_user is not None:
+                return from_user.id
+        return update.update_id
+
+    def __respond(self, start_response: _StartResponse, status: str, body: dict[str, Any], headers: list[tuple[str, str]]|None = None) -> Iterable[bytes]:
+        payload: bytes = json.dumps(body).encode("UTF-8")
+        start_response(status, [("Content-Type", "application/json"), ("Content-Length", str(len(payload)))] + (headers or []))
+        return [payload]
+
+    def __call__(self, environ: dict[str, Any], start_response: _StartResponse) -> Iterable[bytes]:
+        if environ.get("PATH_INFO") != self.path:
+            return self.__respond(start_response, "404 Not Found", {"ok": False})
+        if environ.get("REQUEST_METHOD") != "POST":
+            return self.__respond(start_response, "405 Method Not Allowed", {"ok": False}, [("Allow", "POST")])
+        if self.secret_token is not None and environ.get(self.secret_header) != self.secret_token:
+            self.metrics.inc("webhook_updates_total", status="forbidden")
+            return self.__respond(start_response, "403 Forbidden", {"ok": False})
+        try:
+            length: int = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length > self.max_body_size:
+            return self.__respond(start_response, "413 Payload Too Large", {"ok": False})
+        try:
+            payload: Any = json.loads(environ["wsgi.input"].read(length))
+            updates: list[Update] = [Update.de_json(update) for update in (payload if isinstance(payload, list) else [payload])]
+        except Exception as exception:
+            self.metrics.inc("webhook_updates_total", status="invalid")
+            self.logger.warning(f"Отримано некоректне оновлення через вебхук: \"{exception}\"")
+            return self.__respond(start_response, "400 Bad Request", {"ok": False})
+
+        accepted: int = 0
+        duplicates: int = 0
+        with self.__lock:
+            for update in updates:
+                if update.update_id in self.__window:
+                    duplicates += 1
+                    continue
+                try:
+                    self.__queues[self.chat_id(update) % self.workers].put_nowait(update)
+                except queue.Full:
+                    self.metrics.inc("webhook_updates_total", accepted, status="accepted")
+                    self.metrics.inc("webhook_updates_total", status="rejected")
+                    self.logger.warning("Черга оновлень вебхука переповнена, Telegram повторить запит пізніше.")
+                    return self.__respond(start_response, "503 Service Unavailable", {"ok": False}, [("Retry-After", "1")])
+                self.__window.add(update.update_id)
+                accepted += 1
+        self.metrics.inc("webhook_updates_total", accepted, status="accepted")
+        self.metrics.inc("webhook_updates_total", duplicates, status="duplicate")
+        return self.__respond(start_response, "200 OK", {"ok": True, "accepted": accepted, "duplicates": duplicates})
+
+    def __work(self, shard: queue.Queue[Update|None]) -> None:
+        while (update := shard.get()) is not None:
+            try:
+                self.bot.process_new_updates([update])
+            except Exception as exception:
+                self.logger.error(f"Помилка під час обробки оновлення {update.update_id}: \"{exception}\"")
+            finally:
+                shard.task_done()
+        shard.task_done()
+
+    def start_workers(self) -> None:
+        if len(self.__threads) > 0:
+            return
+        for index, shard in enumerate(self.__queues):
+            thread: Thread = Thread(target=self.__work, args=(shard,), name=f"webhook-{index}", daemon=True)
+            thread.start()
+            self.__threads.append(thread)
+
+    def join(self) -> None:
+        for shard in self.__queues:
+            shard.join()
+
+    def set_webhook(self, url: str) -> None:
+        self.bot.set_webhook(url=url.rstrip('/') + self.path, secret_token=self.secret_token, allowed_updates=util.update_types)
+        self.logger.info(f"Вебхук встановлено на {url.rstrip('/') + self.path}")
+
+    def serve_forever(self, host: str, port: int) -> None:
+        self.start_workers()
+        server: _ThreadingWSGIServer = make_server(host, port, self, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+        self.__server = server
+        self.logger.info(f"Вебхук приймає оновлення на http://{host}:{port}{self.path}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+    def shutdown(self) -> None:
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server = None
+        for shard in self.__queues[:len(self.__threads)]:
+            shard.put(None)
+        for thread in self.__threads:
+            thread.join()
+        self.__threads.clear()
+
+if __name__ == "__main__":
+    exit()
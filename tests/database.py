@@ -0,0 +1,39 @@
+import os
+import json
+import logging
+import tempfile
+from datetime import date, datetime, timedelta
+
+from modules.sqlite_db import SQLite
+from modules.sql_queries import Queries
+from modules.json_file import JSON_File
+from modules.timetable import Timetable
+
+
+class SeededDatabase:
+    def __init__(self, rings: int = 4, subscribers: int = 5):
+        self.logger: logging.Logger = logging.getLogger("tests")
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage: SQLite = SQLite(os.path.join(self.directory.name, "test.sqlite3"), self.logger, pool_size=2)
+        self.queries: Queries = Queries(self.storage.cursor, self.logger)
+        self.queries.create_tables()
+        with self.storage.cursor() as cursor:
+            for ring_id in range(1, rings + 1):
+                start: datetime = datetime(2000, 1, 1, 8) + timedelta(minutes=95 * (ring_id - 1))
+                cursor.execute("INSERT INTO `ring` VALUES (%s, %s, %s, %s)", [ring_id, f"{ring_id} пара", start, start + timedelta(minutes=80)])
+                cursor.execute("INSERT INTO `lesson` (name, link) VALUES (%s, %s)", [f"Заняття {ring_id}", f"https://meet.example/{ring_id}"])
+            for weekday_id in range(1, 8):
+                for ring_id in range(1, rings + 1):
+                    cursor.execute("INSERT INTO `timetable` (weekday_id, ring_id, lesson_id) VALUES (%s, %s, %s)",
+                                   [weekday_id, ring_id, ring_id + 1 if weekday_id < 6 else 1])
+            cursor.executemany("INSERT INTO `sticker` VALUES (%s, %s)", [[f"{sticker_type}_1", sticker_type] for sticker_type in
+                                                                       ["happy", "study", "sad", "lovely", "service", "error"]])
+            cursor.executemany("INSERT INTO `user` VALUES (%s, 1)", [[user_id] for user_id in range(1, subscribers + 1)])
+        config_filename: str = os.path.join(self.directory.name, "config.json")
+        with open(config_filename, 'w', encoding="UTF-8") as config_file:
+            json.dump({"first_flasher_monday": date(2026, 1, 5).isoformat()}, config_file)
+        self.timetable: Timetable = Timetable(self.queries, self.logger, JSON_File(config_filename))
+
+    def close(self) -> None:
+        self.storage.close()
+        self.directory.cleanup()
@@ -0,0 +1,33 @@
+import os
+import logging
+import tempfile
+import unittest
+
+from telebot.types import BotCommand, BotCommandScopeDefault
+
+from modules.bootstrap import Bootstrap
+
+
+class BootstrapStateTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename: str = os.path.join(self.directory.name, "bot_state.json")
+        self.bootstrap = Bootstrap(logging.getLogger("tests"), self.filename)
+
+    def tearDown(self):
+        self.bootstrap.shutdown()
+        self.directory.cleanup()
+
+    def test_state_file_is_created_on_first_write(self):
+        commands = [([BotCommand("start", "Перезапустити бота")], BotCommandScopeDefault())]
+        self.assertIsNotNone(self.bootstrap.commands_changed("1", commands))
+        self.assertIsNone(self.bootstrap.cached_me("1"))
+        self.assertFalse(os.path.exists(self.filename))
+        digest = self.bootstrap.commands_changed("1", commands)
+        assert digest is not None
+        self.bootstrap.remember_commands(digest)
+        self.assertTrue(os.path.exists(self.filename))
+        self.assertIsNone(Bootstrap(logging.getLogger("tests"), self.filename).commands_changed("1", commands))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import logging
+import unittest
+from unittest import mock
+
+from modules.conversation import ConversationStore
+from modules.dict_types import ConversationDicts, TableDicts
+
+def state(step: str) -> ConversationDicts.StateDict:
+    return {"step": step, "column_name": None, "weekday_id": None, "ring_id": None, "lesson_id": None, "message_id": None}
+
+
+class MemoryBackend:
+    def __init__(self):
+        self.rows: dict[tuple[int, int], TableDicts.ConversationDict] = dict()
+
+    def get_conversations(self, now: float) -> list[TableDicts.ConversationDict]:
+        return [row for row in self.rows.values() if row["expires_at"] > now]
+
+    def set_conversation(self, chat_id: int, user_id: int, state: str, expires_at: float) -> None:
+        self.rows[(chat_id, user_id)] = {"chat_id": chat_id, "user_id": user_id, "state": state, "expires_at": expires_at}
+
+    def delete_conversation(self, chat_id: int, user_id: int) -> None:
+        self.rows.pop((chat_id, user_id), None)
+
+
+class ConversationStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("tests")
+        self.backend = MemoryBackend()
+
+    def test_evicts_least_recently_used(self):
+        store = ConversationStore(self.logger, self.backend, max_size=2)
+        store.set(1, 1, state("first"))
+        store.set(2, 2, state("second"))
+        self.assertIsNotNone(store.get(1, 1))
+        store.set(3, 3, state("third"))
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.get(2, 2))
+        self.assertEqual(set(self.backend.rows), {(1, 1), (3, 3)})
+
+    def test_expires_after_ttl(self):
+        store = ConversationStore(self.logger, self.backend, ttl=10)
+        with mock.patch("modules.conversation.time.time", return_value=1000.0):
+            store.set(1, 1, state("step"))
+        with mock.patch("modules.conversation.time.time", return_value=1009.0):
+            self.assertEqual(store.get(1, 1), state("step"))
+        with mock.patch("modules.conversation.time.time", return_value=1011.0):
+            self.assertIsNone(store.get(1, 1))
+        self.assertEqual(self.backend.rows, {})
+
+    def test_pop_removes_state(self):
+        store = ConversationStore(self.logger, self.backend)
+        store.set(1, 1, state("step"))
+        self.assertEqual(store.pop(1, 1), state("step"))
+        self.assertIsNone(store.pop(1, 1))
+        self.assertEqual(self.backend.rows, {})
+
+    def test_load_restores_and_bounds_states(self):
+        writer = ConversationStore(self.logger, self.backend)
+        for user_id in range(3):
+            writer.set(1, user_id, state(f"step {user_id}"))
+        store = ConversationStore(self.logger, self.backend, max_size=2)
+        self.assertEqual(store.load(), 3)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.get(1, 2), state("step 2"))
+        self.assertEqual(len(self.backend.rows), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+from dataclasses import fields
+
+from modules.dict_types import TableRows, column_name, field_name
+
+
+class FieldNameTest(unittest.TestCase):
+    def test_keywords_round_trip(self):
+        self.assertEqual(field_name("class"), "class_")
+        self.assertEqual(column_name("class_"), "class")
+        for column in ["class", "if", "name", "link", "max_grade", "ifs", "_", ""]:
+            self.assertEqual(column_name(field_name(column)), column)
+
+    def test_plain_fields_are_unchanged(self):
+        for field in ["ifs", "classes", "name", "_", ""]:
+            self.assertEqual(column_name(field), field)
+
+    def test_row_fields_round_trip(self):
+        for row_type in [TableRows.Ring, TableRows.Weekday, TableRows.Lesson, TableRows.Timetable]:
+            for field in fields(row_type):
+                self.assertEqual(field_name(column_name(field.name)), field.name)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+
+from bot_utils import BotUtils
+from utils import Utils
+from tests.database import SeededDatabase
+
+NOW: datetime = datetime(2026, 10, 12, 9, 0)
+
+
+class OutboxTest(unittest.TestCase):
+    def setUp(self):
+        self.database = SeededDatabase()
+        self.queries = self.database.queries
+
+    def tearDown(self):
+        self.database.close()
+
+    def restarted_bot_utils(self) -> tuple[BotUtils, mock.Mock]:
+        bot = mock.Mock()
+        utils = Utils(self.queries, self.database.timetable, self.database.timetable.json_file, self.database.logger)
+        return BotUtils(bot, self.queries, utils, self.database.logger), bot
+
+    def sent_chats(self, bot: mock.Mock) -> list[int]:
+        return sorted(call.args[0] for call in bot.send_message.call_args_list)
+
+    def test_resume_sends_only_pending_chats(self):
+        broadcast = self.queries.create_broadcast("interrupted", "Пара", "happy_1", None, NOW)
+        assert broadcast is not None
+        self.queries.set_outbox_status(broadcast["id"], [1, 2], "sent")
+        bot_utils, bot = self.restarted_bot_utils()
+        bot_utils.resume_distribution(NOW)
+        self.assertEqual(self.sent_chats(bot), [3, 4, 5])
+        self.assertEqual(bot.send_sticker.call_count, 3)
+        self.assertEqual(self.queries.get_pending_broadcasts(), [])
+
+    def test_duplicate_key_is_not_sent_twice(self):
+        self.assertIsNotNone(self.queries.create_broadcast("once", "Пара", None, None, NOW))
+        self.assertIsNone(self.queries.create_broadcast("once", "Пара", None, None, NOW))
+
+    def test_expired_broadcast_is_not_resumed(self):
+        broadcast = self.queries.create_broadcast("stale", "Пара", None, NOW - timedelta(minutes=1), NOW - timedelta(minutes=30))
+        assert broadcast is not None
+        bot_utils, bot = self.restarted_bot_utils()
+        bot_utils.resume_distribution(NOW)
+        bot.send_message.assert_not_called()
+        self.assertEqual(self.queries.get_pending_broadcasts(), [])
+
+    def test_prune_compares_created_at_with_bot_clock(self):
+        for key, created_at in [("old", NOW - timedelta(days=1, minutes=1)), ("recent", NOW - timedelta(hours=23))]:
+            broadcast = self.queries.create_broadcast(key, "Пара", None, None, created_at)
+            assert broadcast is not None
+            self.queries.set_outbox_status(broadcast["id"], [1, 2, 3, 4, 5], "sent")
+        self.assertEqual(self.queries.prune_broadcasts(NOW), 1)
+        self.assertIsNotNone(self.queries.create_broadcast("old", "Пара", None, None, NOW))
+        self.assertIsNone(self.queries.create_broadcast("recent", "Пара", None, None, NOW))
+
+    def test_prune_keeps_unfinished_broadcasts(self):
+        self.queries.create_broadcast("pending", "Пара", None, None, NOW - timedelta(days=2))
+        self.assertEqual(self.queries.prune_broadcasts(NOW), 0)
+        self.assertEqual(len(self.queries.get_pending_broadcasts()), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from tests.database import SeededDatabase
+
+
+class SetSubscriptionsTest(unittest.TestCase):
+    def setUp(self):
+        self.database = SeededDatabase(subscribers=3)
+        self.queries = self.database.queries
+
+    def tearDown(self):
+        self.database.close()
+
+    def subscribers(self) -> list[int]:
+        with self.database.storage.cursor() as cursor:
+            cursor.execute("SELECT id FROM `user` WHERE is_subscriber = 1 ORDER BY id")
+            return [row["id"] for row in cursor.fetchall()]
+
+    def test_inserts_and_updates_in_batches(self):
+        self.queries.set_subscriptions([2, 3, 4, 5, 6], False, batch_size=2)
+        self.assertEqual(self.subscribers(), [1])
+        self.queries.set_subscriptions([1, 5, 6, 7], True, batch_size=3)
+        self.assertEqual(self.subscribers(), [1, 5, 6, 7])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+from datetime import date, datetime
+
+from modules.scheduler import DayScheduler
+from modules.dict_types import SchedulerDicts
+from tests.database import SeededDatabase
+
+MONDAY: date = date(2026, 10, 12)
+
+
+class DaySchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.database = SeededDatabase()
+        self.sent: list[str] = list()
+        self.scheduler = DayScheduler(self.database.queries, self.database.timetable, datetime.now,
+                                      lambda text, sticker_type, key, expires_at: self.sent.append(key), self.database.logger)
+
+    def tearDown(self):
+        self.database.close()
+
+    def due(self, now: datetime) -> list[SchedulerDicts.EventDict]:
+        return self.scheduler._DayScheduler__pop_due(now)
+
+    def test_restart_inside_notice_window_keeps_notice(self):
+        keys: list[str] = [event["key"] for event in self.due(datetime(MONDAY.year, MONDAY.month, MONDAY.day, 8, 30))]
+        self.assertIn(f"{MONDAY} 1 lesson", keys)
+        self.assertNotIn(f"{MONDAY} 2 lesson", keys)
+
+    def test_restart_skips_only_expired_events(self):
+        keys: list[str] = [event["key"] for event in self.due(datetime(MONDAY.year, MONDAY.month, MONDAY.day, 9, 25))]
+        self.assertNotIn(f"{MONDAY} 1 lesson", keys)
+        self.assertIn(f"{MONDAY} 1 next", keys)
+        self.assertIn(f"{MONDAY} 1 cleanup", keys)
+
+    def test_rebuild_after_change_keeps_pending_notice(self):
+        now: datetime = datetime(MONDAY.year, MONDAY.month, MONDAY.day, 9, 0)
+        self.assertEqual(self.due(datetime(MONDAY.year, MONDAY.month, MONDAY.day, 7, 0)), [])
+        self.database.queries.update_timetable(1, 3, "remind", "Контрольна")
+        self.assertIn(f"{MONDAY} 1 lesson", [event["key"] for event in self.due(now)])
+
+    def test_failed_build_is_retried(self):
+        now: datetime = datetime(MONDAY.year, MONDAY.month, MONDAY.day, 8, 30)
+        failures: list[Exception] = [RuntimeError("БД недоступна")]
+        get_weekdays = self.database.queries.get_weekdays
+        with mock.patch.object(self.database.queries, "get_weekdays", side_effect=lambda: get_weekdays() if len(failures) < 1 else self.fail_with(failures)):
+            with self.assertRaises(RuntimeError):
+                self.due(now)
+            self.assertIn(f"{MONDAY} 1 lesson", [event["key"] for event in self.due(now)])
+
+    def test_run_survives_errors(self):
+        failures: list[Exception] = [RuntimeError("Невірна часова зона")]
+        def get_datetime() -> datetime:
+            if len(failures) > 0:
+                raise failures.pop()
+            return datetime(MONDAY.year, MONDAY.month, MONDAY.day, 8, 30)
+        timeouts: list[float] = list()
+        def wait(timeout: float) -> bool:
+            timeouts.append(timeout)
+            if len(timeouts) > 1:
+                raise StopIteration
+            return False
+        self.scheduler.get_datetime = get_datetime
+        with mock.patch.object(self.scheduler._DayScheduler__changed, "wait", side_effect=wait), self.assertLogs("tests", "ERROR"):
+            with self.assertRaises(StopIteration):
+                self.scheduler.run()
+        self.assertEqual(timeouts[0], DayScheduler.retry_interval)
+        self.assertIn(f"{MONDAY} 1 lesson", self.sent)
+
+    @staticmethod
+    def fail_with(failures: list[Exception]):
+        raise failures.pop()
+
+    def test_weekend_plans_only_cleanup(self):
+        saturday: date = date(2026, 10, 17)
+        self.assertEqual([event["kind"] for event in self.scheduler.plan(saturday)], ["day_cleanup"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from datetime import datetime
+
+from tests.database import SeededDatabase
+
+
+class TimetableTest(unittest.TestCase):
+    def setUp(self):
+        self.database = SeededDatabase()
+
+    def tearDown(self):
+        self.database.close()
+
+    def test_find_lesson_returns_ring_on_requested_date(self):
+        found = self.database.timetable.find_lesson(datetime(2026, 10, 12, 9, 40))
+        assert not isinstance(found, str)
+        self.assertEqual(found["ring"].id, 2)
+        self.assertEqual(found["ring"].start, datetime(2026, 10, 12, 9, 35))
+        self.assertEqual(found["ring"].end, datetime(2026, 10, 12, 10, 55))
+        self.assertEqual(self.database.timetable.get_rings(datetime(2026, 10, 12).date())[1], found["ring"])
+
+    def test_find_lesson_outside_rings(self):
+        self.assertIsInstance(self.database.timetable.find_lesson(datetime(2026, 10, 12, 6, 0)), str)
+        self.assertIsInstance(self.database.timetable.find_lesson(datetime(2026, 10, 12, 9, 25)), str)
+        self.assertIsInstance(self.database.timetable.find_lesson(datetime(2026, 10, 17, 9, 40)), str)
+
+if __name__ == "__main__":
+    unittest.main()
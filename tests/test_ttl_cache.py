@@ -0,0 +1,85 @@
+import asyncio
+import traceback
+import unittest
+from unittest import mock
+
+from modules.ttl_cache import TTLCache
+
+class Clock:
+    def __init__(self):
+        self.now: float = 1000
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TTLCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("modules.ttl_cache.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_value_expires_after_ttl(self):
+        cache: TTLCache[int] = TTLCache(ttl=10)
+        load = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(cache.get("key", load), 1)
+        self.clock.now += 9
+        self.assertEqual(cache.get("key", load), 1)
+        self.clock.now += 1
+        self.assertEqual(cache.get("key", load), 2)
+        self.assertEqual(load.call_count, 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_errors_are_cached_for_negative_ttl(self):
+        cache: TTLCache[int] = TTLCache(ttl=10, negative_ttl=5)
+        load = mock.Mock(side_effect=[LookupError("missing"), 3])
+        with self.assertRaises(LookupError):
+            cache.get("key", load, (LookupError,))
+        with self.assertRaises(LookupError):
+            cache.get("key", load, (LookupError,))
+        self.assertEqual(load.call_count, 1)
+        self.clock.now += 5
+        self.assertEqual(cache.get("key", load, (LookupError,)), 3)
+
+    def test_unlisted_errors_are_not_cached(self):
+        cache: TTLCache[int] = TTLCache(ttl=10, negative_ttl=5)
+        load = mock.Mock(side_effect=[KeyError("key"), 4])
+        with self.assertRaises(KeyError):
+            cache.get("key", load, (ValueError,))
+        self.assertEqual(cache.get("key", load, (ValueError,)), 4)
+
+    def test_cached_error_traceback_does_not_grow(self):
+        cache: TTLCache[int] = TTLCache(ttl=10, negative_ttl=60)
+        def fail() -> int:
+            raise LookupError("missing")
+        depths: list[int] = list()
+        for _ in range(5):
+            try:
+                cache.get("key", fail, (LookupError,))
+            except LookupError as error:
+                depths.append(len(traceback.extract_tb(error.__traceback__)))
+        self.assertEqual(len(set(depths[1:])), 1)
+
+    def test_get_async(self):
+        cache: TTLCache[int] = TTLCache(ttl=10)
+        calls: list[int] = list()
+        async def load() -> int:
+            calls.append(1)
+            return 5
+        async def run() -> list[int]:
+            return [await cache.get_async("key", load) for _ in range(3)]
+        self.assertEqual(asyncio.run(run()), [5, 5, 5])
+        self.assertEqual(len(calls), 1)
+
+    def test_evicts_oldest_beyond_max_size(self):
+        cache: TTLCache[int] = TTLCache(ttl=10, max_size=2)
+        cache.set("first", 1)
+        cache.set("second", 2)
+        cache.set("third", 3)
+        load = mock.Mock(return_value=0)
+        self.assertEqual(cache.get("first", load), 0)
+        self.assertEqual(cache.get("third", load), 3)
+
+if __name__ == "__main__":
+    unittest.main()